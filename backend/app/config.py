@@ -5,6 +5,9 @@ from functools import lru_cache
 class Settings(BaseSettings):
     database_url: str = "sqlite:///./data/mimi.db"
     app_name: str = "Mimi.Today"
+    # Re-check template files for changes on every render. Turn off in
+    # production (TEMPLATE_AUTO_RELOAD=false) when templates aren't edited live.
+    template_auto_reload: bool = True
 
     class Config:
         env_file = ".env"
@@ -1,20 +1,254 @@
+from functools import lru_cache
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
 from sqlmodel import SQLModel, create_engine, Session
 from app.config import get_settings
+from app.models import ENUM_CODES, RepeatType, TaskPriority, TaskStatus, weekdays_to_mask
+
+# Applied to every new SQLite connection. WAL lets readers proceed while a
+# write is in flight, and synchronous=NORMAL is still crash-safe under WAL
+# while skipping the fsync on every commit.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",  # ~64MB page cache (negative = KiB)
+    "PRAGMA mmap_size=268435456",  # 256MB
+    "PRAGMA foreign_keys=ON",
+)
+
+# Read-only connections can't change the journal mode; they just pick up
+# WAL from the file once the writer has switched it on.
+SQLITE_READ_PRAGMAS = (
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA query_only=ON",
+)
+
+
+def _run_pragmas(dbapi_connection, pragmas) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in pragmas:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Connect hook that tunes a raw sqlite3 connection."""
+    _run_pragmas(dbapi_connection, SQLITE_PRAGMAS)
+
+
+def set_sqlite_read_pragmas(dbapi_connection, connection_record):
+    """Connect hook for connections in the read-only pool."""
+    _run_pragmas(dbapi_connection, SQLITE_READ_PRAGMAS)
+
+
+# Refresh planner statistics after this many checkins of a writer connection
+OPTIMIZE_EVERY = 500
+
+
+def optimize_on_checkin(dbapi_connection, connection_record):
+    """Checkin hook that runs PRAGMA optimize every OPTIMIZE_EVERY checkins."""
+    checkins = connection_record.info.get("checkins", 0) + 1
+    connection_record.info["checkins"] = checkins
+    if checkins % OPTIMIZE_EVERY == 0:
+        _run_pragmas(dbapi_connection, ("PRAGMA optimize",))
+
+
+def _is_memory_sqlite(database_url: str) -> bool:
+    url = make_url(database_url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _read_only_url(database_url: str) -> str | None:
+    """Return a read-only URI for a file-backed SQLite database, if possible."""
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite" or _is_memory_sqlite(database_url):
+        return None
+    if url.database.startswith("file:"):
+        return None  # Already a URI filename; leave it alone
+    return f"sqlite:///file:{url.database}?mode=ro&uri=true"
 
-settings = get_settings()
 
 # SQLite needs check_same_thread=False for FastAPI
 connect_args = {"check_same_thread": False}
-engine = create_engine(settings.database_url, connect_args=connect_args, echo=False)
+
+
+@lru_cache
+def get_engine():
+    """Read-write engine, built on first use so importing this module is cheap."""
+    database_url = get_settings().database_url
+    if _is_memory_sqlite(database_url):
+        # An in-memory database only lives as long as its connection
+        engine = create_engine(
+            database_url,
+            connect_args=connect_args,
+            echo=False,
+            poolclass=StaticPool,
+        )
+    else:
+        # SQLite allows a single writer at a time, so queue writers on one
+        # pooled connection rather than letting them fight over the file lock.
+        engine = create_engine(
+            database_url,
+            connect_args=connect_args,
+            echo=False,
+            poolclass=QueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_pre_ping=False,
+            pool_recycle=-1,
+        )
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", set_sqlite_pragmas)
+        event.listen(engine, "checkin", optimize_on_checkin)
+    return engine
+
+
+@lru_cache
+def get_read_engine():
+    """Engine for GET-only routes.
+
+    Under WAL any number of readers can run alongside the writer, so these
+    get their own pool of read-only connections.
+    """
+    ro_url = _read_only_url(get_settings().database_url)
+    if not ro_url:
+        return get_engine()
+    read_engine = create_engine(
+        ro_url,
+        connect_args=connect_args,
+        echo=False,
+        poolclass=QueuePool,
+        pool_size=8,
+        max_overflow=0,
+        pool_pre_ping=False,
+        pool_recycle=-1,
+    )
+    event.listen(read_engine, "connect", set_sqlite_read_pragmas)
+    return read_engine
+
+
+# Enum columns that used to hold member names as TEXT
+ENUM_COLUMNS = (
+    ("task", "priority", TaskPriority),
+    ("task", "status", TaskStatus),
+    ("tasktemplate", "priority", TaskPriority),
+    ("tasktemplate", "repeat_type", RepeatType),
+)
+
+
+def migrate_enum_codes(engine) -> None:
+    """Rewrite enum names stored by older versions as their integer codes."""
+    with engine.begin() as conn:
+        for table, column, enum_cls in ENUM_COLUMNS:
+            codes = ENUM_CODES[enum_cls]
+            whens = " ".join(f"WHEN '{m.name}' THEN {code}" for m, code in codes.items())
+            names = ", ".join(f"'{m.name}'" for m in codes)
+            conn.execute(text(
+                f'UPDATE {table} SET "{column}" = CASE "{column}" {whens} END '
+                f'WHERE "{column}" IN ({names})'
+            ))
+
+
+def migrate_weekdays_mask(engine) -> None:
+    """Move the old comma-separated tasktemplate.weekdays into weekdays_mask."""
+    with engine.begin() as conn:
+        columns = {c["name"] for c in inspect(conn).get_columns("tasktemplate")}
+        if "weekdays" not in columns:
+            return
+        if "weekdays_mask" not in columns:
+            conn.execute(text(
+                "ALTER TABLE tasktemplate ADD COLUMN weekdays_mask INTEGER NOT NULL DEFAULT 0"
+            ))
+        rows = conn.execute(text("SELECT id, weekdays FROM tasktemplate")).all()
+        if rows:
+            conn.execute(
+                text("UPDATE tasktemplate SET weekdays_mask = :mask WHERE id = :id"),
+                [{"id": id, "mask": weekdays_to_mask(weekdays or "")} for id, weekdays in rows],
+            )
+        conn.execute(text("ALTER TABLE tasktemplate DROP COLUMN weekdays"))
+
+
+def dedupe_template_tasks(engine) -> None:
+    """
+    Drop duplicate template tasks on the same day so the unique
+    (template_id, scheduled_date) index can be built. A completed copy is
+    kept over a pending one, otherwise the oldest.
+    """
+    with engine.begin() as conn:
+        if "uq_task_template_date" in {i["name"] for i in inspect(conn).get_indexes("task")}:
+            return
+        conn.execute(text(
+            "DELETE FROM task WHERE template_id IS NOT NULL AND id != ("
+            "SELECT keep.id FROM task AS keep "
+            "WHERE keep.template_id = task.template_id "
+            "AND keep.scheduled_date = task.scheduled_date "
+            "ORDER BY keep.status DESC, keep.id LIMIT 1)"
+        ))
+
+
+# Indexes from older schemas that a newer index now covers
+SUPERSEDED_INDEXES = (
+    "ix_task_scheduled_date",  # Prefix of ix_task_date_priority_order
+    "ix_task_template_date",  # Replaced by uq_task_template_date
+    "ix_tasktemplate_active_order",  # Replaced by partial ix_template_active_order
+)
 
 
 def create_db_and_tables():
+    engine = get_engine()
     SQLModel.metadata.create_all(engine)
+    migrate_enum_codes(engine)
+    migrate_weekdays_mask(engine)
+    dedupe_template_tasks(engine)
+    # create_all skips tables that already exist, so add any indexes that
+    # were introduced after the database was first created.
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    with engine.begin() as conn:
+        for name in SUPERSEDED_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+def checkpoint_wal() -> None:
+    """Fold the WAL back into the database file and truncate it (on shutdown)."""
+    engine = get_engine()
+    if engine.dialect.name != "sqlite" or _is_memory_sqlite(str(engine.url)):
+        return
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA optimize")
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+@lru_cache
+def get_session_factory() -> sessionmaker:
+    """Session factory for the read-write engine."""
+    # Keep attributes loaded after commit so handlers can read them back
+    # without another SELECT
+    return sessionmaker(get_engine(), class_=Session, expire_on_commit=False)
+
+
+@lru_cache
+def get_ro_session_factory() -> sessionmaker:
+    """Session factory for the read-only engine."""
+    return sessionmaker(get_read_engine(), class_=Session, expire_on_commit=False)
 
 
 def get_session():
-    with Session(engine) as session:
+    """Read-write session for routes that modify data."""
+    with get_session_factory()() as session:
         yield session
 
 
-
+def get_ro_session():
+    """Session on the read-only pool, for routes that never write."""
+    with get_ro_session_factory()() as session:
+        yield session
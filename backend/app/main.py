@@ -1,48 +1,67 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import FileResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from contextlib import asynccontextmanager
+from functools import lru_cache
 from pathlib import Path
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 import logging
 
-from app.database import create_db_and_tables
+from app.database import checkpoint_wal, create_db_and_tables
 from app.routers import tasks, admin
 from app.config import get_settings
+from app.static_files import CachedFile, CachedStaticFiles, load_static_file, make_etag
 
-# Configure logging
-log_dir = Path(__file__).parent.parent / "logs"
-log_dir.mkdir(exist_ok=True)
-log_file = log_dir / "mimi_app.log"
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
-settings = get_settings()
+
+class LazyBytecodeCache(FileSystemBytecodeCache):
+    """Bytecode cache that creates its directory on first write, not at import."""
+
+    def dump_bytecode(self, bucket) -> None:
+        Path(self.directory).mkdir(exist_ok=True)
+        super().dump_bytecode(bucket)
+
+
+def configure_logging() -> None:
+    """Log to stdout and to logs/mimi_app.log."""
+    log_dir = Path(__file__).parent.parent / "logs"
+    log_dir.mkdir(exist_ok=True)
+    log_file = log_dir / "mimi_app.log"
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler()
+        ]
+    )
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: create tables
+    configure_logging()
     logger.info("Starting Mimi.Today application...")
     create_db_and_tables()
     logger.info("Database initialized")
+    if static_files is not None:
+        logger.info(f"Cached {static_files.warm()} static files")
+    if templates is not None and not get_settings().template_auto_reload:
+        for page in PAGES:
+            prerender_page(page)
     yield
-    # Shutdown: cleanup if needed
+    # Shutdown: keep the WAL file from growing across restarts
     logger.info("Shutting down Mimi.Today application...")
+    checkpoint_wal()
 
 
 app = FastAPI(
-    title=settings.app_name,
+    title=get_settings().app_name,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS for Flutter web / dev
@@ -60,42 +79,87 @@ app.include_router(admin.router)
 
 # Static files for HTMX frontend
 static_path = Path(__file__).parent.parent / "static"
+static_files = None
 if static_path.exists():
-    app.mount("/static", StaticFiles(directory=static_path), name="static")
+    static_files = CachedStaticFiles(directory=static_path)
+    app.mount("/static", static_files, name="static")
 
 # Templates for HTMX frontend
 templates_path = Path(__file__).parent.parent / "templates"
+templates = None
+PAGES = ("mimi.html", "admin.html", "theme_test.html")
+# Shells are revalidated after a minute; a 304 costs no render or body
+PAGE_CACHE_CONTROL = "private, max-age=60, must-revalidate"
 if templates_path.exists():
-    templates = Jinja2Templates(directory=templates_path)
+    # Compiled templates are kept in memory and their bytecode on disk, so
+    # neither a render nor a worker restart has to re-parse the HTML.
+    jinja_cache_path = Path(__file__).parent.parent / ".jinja_cache"
+    templates = Jinja2Templates(env=Environment(
+        loader=FileSystemLoader(templates_path),
+        bytecode_cache=LazyBytecodeCache(directory=str(jinja_cache_path)),
+        auto_reload=get_settings().template_auto_reload,
+        cache_size=400,
+        autoescape=True,
+    ))
+
+    @lru_cache(maxsize=None)
+    def prerender_page(name: str) -> tuple[bytes, str]:
+        """Render a page shell once; the pages take no per-request context."""
+        body = templates.get_template(name).render().encode()
+        return body, make_etag(body)
+
+    def render_page(request: Request, name: str):
+        if get_settings().template_auto_reload:
+            body = templates.get_template(name).render(request=request).encode()
+            etag = make_etag(body)
+        else:
+            body, etag = prerender_page(name)
+        headers = {"ETag": etag, "Cache-Control": PAGE_CACHE_CONTROL}
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+        return HTMLResponse(body, headers=headers)
 
     @app.get("/")
     async def mimi_page(request: Request):
         """Mimi's task view (HTMX)."""
-        return templates.TemplateResponse("mimi.html", {"request": request})
+        return render_page(request, "mimi.html")
 
     @app.get("/admin")
     async def admin_page(request: Request):
         """Ilse's admin view (HTMX)."""
-        return templates.TemplateResponse("admin.html", {"request": request})
+        return render_page(request, "admin.html")
 
     @app.get("/theme-test")
     async def theme_test_page(request: Request):
         """Theme testing/debugging page."""
-        return templates.TemplateResponse("theme_test.html", {"request": request})
+        return render_page(request, "theme_test.html")
 
 
 @app.get("/health")
-def health_check():
-    return {"status": "ok", "app": settings.app_name}
+async def health_check():
+    return {"status": "ok", "app": get_settings().app_name}
 
 
-@app.get("/favicon.ico")
-async def favicon():
-    """Serve favicon."""
-    favicon_path = Path(__file__).parent.parent / "static" / "favicon.ico"
-    if favicon_path.exists():
-        return FileResponse(favicon_path)
-    return FileResponse(status_code=204)  # No content
+# The URL is unversioned, so browsers revalidate it against the ETag daily
+FAVICON_CACHE_CONTROL = "public, max-age=86400"
+
 
+def load_favicon() -> CachedFile | None:
+    """The favicon from the static file cache, re-read only when the file changes."""
+    favicon_path = static_path / "favicon.ico"
+    if not favicon_path.exists():
+        return None
+    stat_result = favicon_path.stat()
+    return load_static_file(str(favicon_path), stat_result.st_mtime_ns, stat_result.st_size)
 
 
+@app.get("/favicon.ico")
+async def favicon(request: Request):
+    """Serve favicon."""
+    icon = load_favicon()
+    if icon is None:
+        return Response(status_code=204)  # No content
+    headers = {"ETag": icon.etag, "Cache-Control": FAVICON_CACHE_CONTROL}
+    if icon.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=icon.body, media_type="image/x-icon", headers=headers)
@@ -1,3 +1,6 @@
+from sqlalchemy import Index, SmallInteger, func, text
+from sqlalchemy.types import TypeDecorator
+from pydantic import ValidationInfo, model_validator
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime, date
 from typing import Optional
@@ -21,33 +24,111 @@ class RepeatType(str, Enum):
     MONTHLY = "monthly"  # Same day of month
 
 
+# Enums are stored as small integer codes; the API keeps using the strings.
+ENUM_CODES = {
+    TaskPriority: {TaskPriority.REQUIRED: 1, TaskPriority.OPTIONAL: 2},
+    TaskStatus: {TaskStatus.PENDING: 0, TaskStatus.COMPLETED: 1},
+    RepeatType: {
+        RepeatType.NONE: 0,
+        RepeatType.DAILY: 1,
+        RepeatType.WEEKLY: 2,
+        RepeatType.MONTHLY: 3,
+    },
+}
+
+
+class CodedEnum(TypeDecorator):
+    """Persist a str Enum as its SMALLINT code from ENUM_CODES."""
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_cls: type[Enum]):
+        super().__init__()
+        self.enum_cls = enum_cls
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return ENUM_CODES[self.enum_cls][self.enum_cls(value)]
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            if not value.isdigit():
+                return self.enum_cls[value]  # Row written before the switch to codes
+            value = int(value)  # Integer stored in a pre-existing TEXT column
+        return _ENUM_MEMBERS[self.enum_cls][value]
+
+
+_ENUM_MEMBERS = {
+    enum_cls: {code: member for member, code in codes.items()}
+    for enum_cls, codes in ENUM_CODES.items()
+}
+
+
+# default= renders CURRENT_TIMESTAMP inline in the INSERT, so it also works on
+# databases created before the column had a server_default.
+CREATED_AT_KWARGS = {"default": func.now(), "server_default": func.now()}
+UPDATED_AT_KWARGS = {**CREATED_AT_KWARGS, "onupdate": func.now()}
+
+
+def weekdays_to_mask(weekdays: str) -> int:
+    """Convert "0,2,4" to a bitmask with bit n set for weekday n."""
+    return sum(1 << d for d in {int(d) for d in weekdays.split(",") if d})
+
+
+def mask_to_weekdays(mask: int) -> str:
+    """Convert a weekday bitmask back to "0,2,4" form."""
+    return ",".join(str(d) for d in range(7) if mask >> d & 1)
+
+
 # TaskTemplate: Defines recurring tasks (managed by Ilse)
 class TaskTemplateBase(SQLModel):
     title: str = Field(index=True)
     description: Optional[str] = None
-    priority: TaskPriority = TaskPriority.OPTIONAL
-    repeat_type: RepeatType = Field(default=RepeatType.NONE)
-    weekdays: str = Field(default="")  # Comma-separated: "0,2,4" for Mon,Wed,Fri
+    priority: TaskPriority = Field(default=TaskPriority.OPTIONAL, sa_type=CodedEnum(TaskPriority))
+    repeat_type: RepeatType = Field(default=RepeatType.NONE, sa_type=CodedEnum(RepeatType))
     order: int = Field(default=0)
     expected_minutes: int = Field(default=30)
     is_active: bool = Field(default=True)
 
 
 class TaskTemplate(TaskTemplateBase, table=True):
+    # Timestamps are stamped by SQLite (CURRENT_TIMESTAMP, UTC) and read back
+    # via RETURNING, so inserts and updates never compute them in Python.
+    # Partial index for active-template listings (WHERE is_active ORDER BY
+    # order); it holds active templates only, already in order.
+    __table_args__ = (
+        Index("ix_template_active_order", "order", sqlite_where=text("is_active = 1")),
+    )
+    __mapper_args__ = {"eager_defaults": True}
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    weekdays_mask: int = Field(default=0)  # Bit n set = weekday n (0=Mon); 0b10101 for Mon,Wed,Fri
+    created_at: Optional[datetime] = Field(default=None, nullable=False, sa_column_kwargs=CREATED_AT_KWARGS)
+    updated_at: Optional[datetime] = Field(default=None, nullable=False, sa_column_kwargs=UPDATED_AT_KWARGS)
 
     # Relationship to generated tasks
     tasks: list["Task"] = Relationship(back_populates="template")
 
+    @property
+    def weekdays(self) -> str:
+        """Comma-separated weekdays ("0,2,4"), as used by the API."""
+        return mask_to_weekdays(self.weekdays_mask)
+
+    @weekdays.setter
+    def weekdays(self, value: str) -> None:
+        self.weekdays_mask = weekdays_to_mask(value)
+
 
 class TaskTemplateCreate(TaskTemplateBase):
-    pass
+    weekdays: str = ""  # Comma-separated: "0,2,4" for Mon,Wed,Fri
 
 
 class TaskTemplateRead(TaskTemplateBase):
     id: int
+    weekdays: str
     created_at: datetime
     updated_at: datetime
 
@@ -67,18 +148,31 @@ class TaskTemplateUpdate(SQLModel):
 class TaskBase(SQLModel):
     title: str
     description: Optional[str] = None
-    priority: TaskPriority
+    priority: TaskPriority = Field(sa_type=CodedEnum(TaskPriority))
     order: int = Field(default=0)
     expected_minutes: int = Field(default=30)
-    scheduled_date: date = Field(index=True)
-    status: TaskStatus = Field(default=TaskStatus.PENDING)
+    scheduled_date: date
+    status: TaskStatus = Field(default=TaskStatus.PENDING, sa_type=CodedEnum(TaskStatus))
 
 
 class Task(TaskBase, table=True):
+    # Serves "tasks for date" lookups in their ORDER BY priority, order,
+    # so SQLite can walk the index instead of sorting. The unique index allows
+    # one task per template per day (ad-hoc tasks have no template and are
+    # left out) and backs per-template lookups in task generation.
+    __table_args__ = (
+        Index("ix_task_date_priority_order", "scheduled_date", "priority", "order"),
+        Index(
+            "uq_task_template_date", "template_id", "scheduled_date",
+            unique=True, sqlite_where=text("template_id IS NOT NULL"),
+        ),
+    )
+    __mapper_args__ = {"eager_defaults": True}
+
     id: Optional[int] = Field(default=None, primary_key=True)
     template_id: Optional[int] = Field(default=None, foreign_key="tasktemplate.id")
     is_snapshot: bool = Field(default=False)  # True = historical record, immutable
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: Optional[datetime] = Field(default=None, nullable=False, sa_column_kwargs=CREATED_AT_KWARGS)
     completed_at: Optional[datetime] = None
 
     # Relationship back to template
@@ -99,6 +193,13 @@ class TaskRead(TaskBase):
     created_at: datetime
     completed_at: Optional[datetime]
 
+    @model_validator(mode="after")
+    def _repeat_info_from_context(self, info: ValidationInfo) -> "TaskRead":
+        """Fill repeat_info from a {template_id: RepeatInfo} validation context."""
+        if self.repeat_info is None and self.template_id and info.context:
+            self.repeat_info = info.context.get(self.template_id)
+        return self
+
 
 class TaskUpdate(SQLModel):
     status: Optional[TaskStatus] = None
@@ -0,0 +1,64 @@
+"""
+In-process caches for serialized list responses.
+
+GET /api/tasks/today and /api/tasks/date/{d} regenerate and re-serialize the
+same list until something is written, and GET /api/admin/templates re-reads
+templates that rarely change. We keep the JSON bytes and drop everything on
+any session commit, so a cached body can never outlive the data it was built
+from. Entries also expire after a TTL to bound staleness from writes made
+outside this process.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlmodel import Session
+
+
+class ResponseCache:
+    """Small thread-safe LRU of response bodies with a TTL."""
+
+    def __init__(self, maxsize: int = 64, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = 0
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, body = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return body
+
+    def set(self, key: str, body: bytes, version: int) -> None:
+        """Store body unless a commit happened since `version` was read."""
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+
+task_list_cache = ResponseCache()
+template_list_cache = ResponseCache(maxsize=2)  # active_only true/false
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session) -> None:
+    task_list_cache.clear()
+    template_list_cache.clear()
@@ -2,31 +2,52 @@
 Admin routes for Ilse (the admin).
 Full CRUD on task templates, manual task generation.
 """
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from sqlmodel import Session, SQLModel
 from datetime import date
 import logging
 
-from app.database import get_session
+from app.database import get_session, get_ro_session
 from app.models import (
     TaskTemplateCreate, TaskTemplateRead, TaskTemplateUpdate,
     TaskRead, TaskCreate, Task
 )
+from app.response_cache import template_list_cache
+from app.routers.responses import json_response, model_response
 from app.services import task_service
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
+TASK_LIST_ADAPTER = TypeAdapter(list[TaskRead])
+
+
+def _construct(model: type[SQLModel], row) -> dict:
+    """Build a response dict from a trusted DB row without re-validating it."""
+    return model.model_construct(
+        **{name: getattr(row, name) for name in model.model_fields}
+    ).model_dump()
+
 
 # ============ Template Management ============
 
 @router.get("/templates", response_model=list[TaskTemplateRead])
 def list_templates(
     active_only: bool = False, 
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_ro_session)
 ):
     """List all task templates."""
-    return task_service.get_templates(session, active_only=active_only)
+    # Returning a response directly skips response_model validation; the
+    # model is still used for the OpenAPI schema.
+    key = f"templates:{active_only}"
+    body = template_list_cache.get(key)
+    if body is None:
+        version = template_list_cache.version
+        body = ORJSONResponse(task_service.get_template_rows(session, active_only=active_only)).body
+        template_list_cache.set(key, body, version)
+    return Response(content=body, media_type="application/json")
 
 
 @router.post("/templates", response_model=TaskTemplateRead)
@@ -35,16 +56,18 @@ def create_template(
     session: Session = Depends(get_session)
 ):
     """Create a new task template."""
-    return task_service.create_template(session, template)
+    return model_response(
+        TaskTemplateRead.model_validate(task_service.create_template(session, template))
+    )
 
 
 @router.get("/templates/{template_id}", response_model=TaskTemplateRead)
-def get_template(template_id: int, session: Session = Depends(get_session)):
+def get_template(template_id: int, session: Session = Depends(get_ro_session)):
     """Get a specific task template."""
     template = task_service.get_template(session, template_id)
     if not template:
         raise HTTPException(status_code=404, detail="Template not found")
-    return template
+    return ORJSONResponse(_construct(TaskTemplateRead, template))
 
 
 @router.patch("/templates/{template_id}", response_model=TaskTemplateRead)
@@ -57,15 +80,15 @@ def update_template(
     template = task_service.update_template(session, template_id, updates)
     if not template:
         raise HTTPException(status_code=404, detail="Template not found")
-    return template
+    return model_response(TaskTemplateRead.model_validate(template))
 
 
-@router.delete("/templates/{template_id}")
+@router.delete("/templates/{template_id}", status_code=204)
 def delete_template(template_id: int, session: Session = Depends(get_session)):
     """Delete a task template."""
     if not task_service.delete_template(session, template_id):
         raise HTTPException(status_code=404, detail="Template not found")
-    return {"ok": True}
+    return Response(status_code=204)
 
 
 # ============ Task Generation ============
@@ -84,10 +107,8 @@ def generate_tasks(target_date: date, session: Session = Depends(get_session)):
 
 # ============ Direct Task Creation ============
 
-@router.post("/tasks", response_model=TaskRead)
-def create_task(task_data: TaskCreate, session: Session = Depends(get_session)):
-    """Create an ad-hoc task for a specific date."""
-    task = Task(
+def _new_task(task_data: TaskCreate) -> Task:
+    return Task(
         title=task_data.title,
         description=task_data.description,
         priority=task_data.priority,
@@ -96,13 +117,27 @@ def create_task(task_data: TaskCreate, session: Session = Depends(get_session)):
         scheduled_date=task_data.scheduled_date,
         template_id=None,
     )
+
+
+@router.post("/tasks", response_model=TaskRead)
+def create_task(task_data: TaskCreate, session: Session = Depends(get_session)):
+    """Create an ad-hoc task for a specific date."""
+    task = _new_task(task_data)
     session.add(task)
     session.commit()
-    session.refresh(task)
-    return task
+    return model_response(TaskRead.model_validate(task))
+
+
+@router.post("/tasks/bulk", response_model=list[TaskRead])
+def create_tasks(tasks_data: list[TaskCreate], session: Session = Depends(get_session)):
+    """Create several ad-hoc tasks in one transaction, returned in request order."""
+    tasks = [_new_task(task_data) for task_data in tasks_data]
+    session.add_all(tasks)
+    session.commit()
+    return json_response(TASK_LIST_ADAPTER, [TaskRead.model_validate(t) for t in tasks])
 
 
-@router.delete("/tasks/{task_id}")
+@router.delete("/tasks/{task_id}", status_code=204)
 def delete_task(task_id: int, session: Session = Depends(get_session)):
     """
     Delete a task. 
@@ -113,18 +148,19 @@ def delete_task(task_id: int, session: Session = Depends(get_session)):
     result = task_service.delete_task_with_template_update(session, task_id)
     if not result:
         raise HTTPException(status_code=404, detail="Task not found")
-    return {"ok": True}
+    return Response(status_code=204)
 
 
-@router.post("/tasks/reorder")
+@router.post("/tasks/reorder", status_code=204)
 def reorder_tasks(task_orders: list[dict], session: Session = Depends(get_session)):
     """
     Update order of multiple tasks. Expects [{id: 1, order: 0}, ...]
     For template-based tasks, also updates the template's order.
     """
-    for item in task_orders:
-        task_service.reorder_task(session, item["id"], item["order"])
-    return {"ok": True}
+    task_service.reorder_tasks(
+        session, {item["id"]: item["order"] for item in task_orders}
+    )
+    return Response(status_code=204)
 
 
 @router.post("/tasks/{task_id}/move")
@@ -133,42 +169,22 @@ def move_task(task_id: int, target_date: date, order: int, session: Session = De
     Move a task to a different date and/or order.
     For template-based tasks, updates the template's weekdays.
     
-    Returns the task at target_date, or {"ok": True} if task was removed
-    from source but target already had an instance (edge case).
+    Returns the task now at target_date.
     """
     logger.info(f"Moving task {task_id} to date={target_date}, order={order}")
-    
-    # Check if task exists before move
-    from app.models import Task
-    original_task = session.get(Task, task_id)
-    if not original_task:
-        logger.warning(f"Task {task_id} not found")
-        raise HTTPException(status_code=404, detail="Task not found")
-    
     result = task_service.move_task_to_date(session, task_id, target_date, order)
+    if not result:
+        raise HTTPException(status_code=404, detail="Task not found")
     
-    if result:
-        logger.info(f"Task moved successfully: id={result.id}, date={result.scheduled_date}")
-        return result
-    else:
-        # Task was successfully processed (e.g., deleted from source when moving to existing day)
-        # Try to find the task on target date
-        target_tasks = task_service.get_tasks_for_date(session, target_date)
-        for t in target_tasks:
-            if original_task.template_id and t.template_id == original_task.template_id:
-                logger.info(f"Returning existing task on target: id={t.id}")
-                return t
-        
-        # Edge case: source was deleted, target might not have task yet (different week)
-        logger.info(f"Move completed - source task deleted")
-        return {"ok": True, "message": "Task removed from source date"}
+    logger.info(f"Task moved successfully: id={result.id}, date={result.scheduled_date}")
+    return result
 
 
 @router.post("/snapshot/{target_date}")
 def create_snapshot(target_date: date, session: Session = Depends(get_session)):
     """Create end-of-day snapshot for a date, preserving task states."""
-    tasks = task_service.create_daily_snapshot(session, target_date)
-    return {"ok": True, "snapshot_count": len(tasks)}
+    snapshot_count = task_service.create_daily_snapshot(session, target_date)
+    return {"ok": True, "snapshot_count": snapshot_count}
 
 
 @router.post("/regenerate/{target_date}")
@@ -186,12 +202,6 @@ def regenerate_week_tasks(session: Session = Depends(get_session)):
     today = date.today()
     monday = today - timedelta(days=today.weekday())
     
-    all_tasks = []
-    for i in range(7):
-        day = monday + timedelta(days=i)
-        logger.info(f"Regenerating tasks for {day}")
-        tasks = task_service.regenerate_tasks_for_date(session, day)
-        all_tasks.extend(tasks)
-    
-    return {"regenerated_count": len(all_tasks)}
-
+    logger.info(f"Regenerating tasks for week of {monday}")
+    count = task_service.regenerate_tasks_for_range(session, monday, 7)
+    return {"regenerated_count": count}
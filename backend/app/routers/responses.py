@@ -0,0 +1,17 @@
+"""
+JSON response helpers shared by the routers.
+
+Routes keep response_model= for the OpenAPI schema but return these
+responses directly, so FastAPI skips re-validation and jsonable_encoder and
+the JSON bytes come straight from pydantic-core.
+"""
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+def json_response(adapter: TypeAdapter, value) -> Response:
+    return Response(content=adapter.dump_json(value), media_type="application/json")
+
+
+def model_response(model: BaseModel) -> Response:
+    return Response(content=model.model_dump_json(), media_type="application/json")
@@ -2,55 +2,66 @@
 Task routes for Mimi (the cleaner).
 GET today's tasks, mark complete/incomplete.
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from pydantic import TypeAdapter
 from sqlmodel import Session
 from datetime import date
 
-from app.database import get_session
-from app.models import TaskRead, TaskUpdate, Task
+from app.database import get_ro_session, get_session
+from app.models import RepeatInfo, TaskRead, TaskUpdate, Task
+from app.response_cache import task_list_cache
+from app.routers.responses import json_response, model_response
 from app.services import task_service
 
 router = APIRouter(prefix="/api/tasks", tags=["tasks"])
 
+TASK_LIST_ADAPTER = TypeAdapter(list[TaskRead])
+HISTORY_ADAPTER = TypeAdapter(dict[str, list[TaskRead]])
 
-def task_to_read(task: Task, session: Session) -> TaskRead:
-    """Convert Task to TaskRead with repeat_info populated."""
-    repeat_info = None
-    if task.template_id:
-        template = task_service.get_template(session, task.template_id)
-        if template:
-            repeat_info = task_service.get_repeat_info(template)
-    
-    return TaskRead(
-        id=task.id,
-        title=task.title,
-        description=task.description,
-        priority=task.priority,
-        order=task.order,
-        expected_minutes=task.expected_minutes,
-        scheduled_date=task.scheduled_date,
-        status=task.status,
-        template_id=task.template_id,
-        is_snapshot=task.is_snapshot,
-        repeat_info=repeat_info,
-        created_at=task.created_at,
-        completed_at=task.completed_at,
+
+def repeat_infos_for(session: Session, tasks: list[Task]) -> dict[int, RepeatInfo]:
+    """RepeatInfo per template id for these tasks, from a single template query."""
+    templates_by_id = task_service.get_templates_by_id(
+        session, {t.template_id for t in tasks if t.template_id}
     )
+    return {
+        template_id: task_service.get_repeat_info(template)
+        for template_id, template in templates_by_id.items()
+    }
+
+
+def tasks_to_read(tasks: list[Task], session: Session) -> list[TaskRead]:
+    """Convert tasks to TaskRead, resolving repeat_info through the validation context."""
+    repeat_infos = repeat_infos_for(session, tasks)
+    return [TaskRead.model_validate(t, context=repeat_infos) for t in tasks]
+
+
+def cached_tasks_response(session: Session, target_date: date, build) -> Response:
+    """Serve a date's task list from task_list_cache, building it on a miss."""
+    key = f"tasks:{target_date}"
+    body = task_list_cache.get(key)
+    if body is None:
+        version = task_list_cache.version  # Read before any commit in build()
+        body = TASK_LIST_ADAPTER.dump_json(tasks_to_read(build(), session))
+        task_list_cache.set(key, body, version)
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/today", response_model=list[TaskRead])
 def get_todays_tasks(session: Session = Depends(get_session)):
     """Get today's tasks, generating them from templates if needed."""
-    task_service.generate_tasks_for_date(session, date.today())
-    tasks = task_service.get_todays_tasks(session)
-    return [task_to_read(t, session) for t in tasks]
+    def build():
+        task_service.generate_tasks_for_date(session, date.today())
+        return task_service.get_todays_tasks(session)
+    return cached_tasks_response(session, date.today(), build)
 
 
 @router.get("/date/{target_date}", response_model=list[TaskRead])
 def get_tasks_for_date(target_date: date, session: Session = Depends(get_session)):
     """Get tasks for a specific date, generating from templates if needed."""
-    tasks = task_service.generate_tasks_for_date(session, target_date)
-    return [task_to_read(t, session) for t in tasks]
+    def build():
+        return task_service.generate_tasks_for_date(session, target_date)
+    return cached_tasks_response(session, target_date, build)
 
 
 @router.post("/{task_id}/complete", response_model=TaskRead)
@@ -59,7 +70,7 @@ def complete_task(task_id: int, session: Session = Depends(get_session)):
     task = task_service.complete_task(session, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task_to_read(task, session)
+    return model_response(tasks_to_read([task], session)[0])
 
 
 @router.post("/{task_id}/uncomplete", response_model=TaskRead)
@@ -68,7 +79,7 @@ def uncomplete_task(task_id: int, session: Session = Depends(get_session)):
     task = task_service.uncomplete_task(session, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task_to_read(task, session)
+    return model_response(tasks_to_read([task], session)[0])
 
 
 @router.patch("/{task_id}", response_model=TaskRead)
@@ -81,17 +92,19 @@ def update_task(
     task = task_service.update_task(session, task_id, updates)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task_to_read(task, session)
+    return model_response(tasks_to_read([task], session)[0])
 
 
-@router.get("/history")
-def get_history(days: int = 7, session: Session = Depends(get_session)):
+@router.get("/history", response_model=dict[str, list[TaskRead]])
+def get_history(days: int = 7, session: Session = Depends(get_ro_session)):
     """Get task completion history for the last N days."""
     history = task_service.get_recent_days(session, days)
-    return {
-        str(d): [task_to_read(t, session) for t in tasks]
+    # One template query for every day, not one per task
+    repeat_infos = repeat_infos_for(session, [t for tasks in history.values() for t in tasks])
+    return json_response(HISTORY_ADAPTER, {
+        str(d): [TaskRead.model_validate(t, context=repeat_infos) for t in tasks]
         for d, tasks in history.items()
-    }
+    })
 
 
 
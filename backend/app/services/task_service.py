@@ -1,9 +1,13 @@
+from sqlalchemy import Date, Integer, and_, case, cast, delete, exists, func, lambda_stmt, literal, or_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlmodel import Session, select
-from datetime import date, datetime
+from datetime import date, timedelta
+from functools import lru_cache
 import logging
 from app.models import (
     Task, TaskTemplate, TaskStatus, TaskPriority, RepeatType,
-    TaskTemplateCreate, TaskTemplateUpdate, TaskUpdate, RepeatInfo
+    TaskTemplateCreate, TaskTemplateUpdate, TaskUpdate, RepeatInfo,
+    mask_to_weekdays, weekdays_to_mask,
 )
 
 logger = logging.getLogger(__name__)
@@ -11,20 +15,36 @@ logger = logging.getLogger(__name__)
 # Day name mapping
 DAY_NAMES = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
 
+# weekdays_mask bits for Mon-Fri, the days a daily template fires on
+WORKDAYS_MASK = 0b0011111
+
+# Day names for every 7-bit weekdays_mask, e.g. MASK_TO_DAYS[0b101] == ("Mon", "Wed")
+MASK_TO_DAYS = tuple(
+    tuple(DAY_NAMES[i] for i in range(7) if mask >> i & 1) for mask in range(128)
+)
+
 
 def get_repeat_info(template: TaskTemplate) -> RepeatInfo | None:
     """Build RepeatInfo from a template."""
-    if not template or template.repeat_type == RepeatType.NONE:
+    if not template:
+        return None
+    return _repeat_info(template.repeat_type, template.weekdays_mask)
+
+
+@lru_cache(maxsize=256)
+def _repeat_info(repeat_type: RepeatType, weekdays_mask: int) -> RepeatInfo | None:
+    # Depends only on these two values, so templates with the same pattern
+    # share one (read-only) RepeatInfo and edits simply produce a new key.
+    if repeat_type == RepeatType.NONE:
         return None
     
-    days = []
-    if template.repeat_type == RepeatType.WEEKLY and template.weekdays:
-        day_indices = [int(d) for d in template.weekdays.split(",") if d]
-        days = [DAY_NAMES[i] for i in day_indices if i < len(DAY_NAMES)]
-    elif template.repeat_type == RepeatType.DAILY:
-        days = DAY_NAMES[:5]  # Mon-Fri
+    days = ()
+    if repeat_type == RepeatType.WEEKLY:
+        days = MASK_TO_DAYS[weekdays_mask & 0x7F]
+    elif repeat_type == RepeatType.DAILY:
+        days = MASK_TO_DAYS[WORKDAYS_MASK]  # Mon-Fri
     
-    return RepeatInfo(type=template.repeat_type, days=days)
+    return RepeatInfo(type=repeat_type, days=list(days))
 
 
 def template_matches_date(template: TaskTemplate, target_date: date) -> bool:
@@ -36,11 +56,8 @@ def template_matches_date(template: TaskTemplate, target_date: date) -> bool:
         return weekday < 5
     
     elif template.repeat_type == RepeatType.WEEKLY:
-        # Check if this weekday is in the template's weekdays list
-        if not template.weekdays:
-            return False
-        weekday_list = [int(d) for d in template.weekdays.split(",") if d]
-        return weekday in weekday_list
+        # Check if this weekday's bit is set in the template's mask
+        return bool(template.weekdays_mask & (1 << weekday))
     
     elif template.repeat_type == RepeatType.MONTHLY:
         # Same day of month as when template was created
@@ -50,28 +67,89 @@ def template_matches_date(template: TaskTemplate, target_date: date) -> bool:
     return False
 
 
+def repeats_on_clause(target_date: date):
+    """
+    SQL equivalent of template_matches_date, for filtering templates in the
+    database.
+    """
+    weekday = target_date.weekday()
+    clauses = [
+        and_(
+            TaskTemplate.repeat_type == RepeatType.WEEKLY,
+            TaskTemplate.weekdays_mask.op("&")(1 << weekday) != 0,
+        ),
+        and_(
+            TaskTemplate.repeat_type == RepeatType.MONTHLY,
+            cast(func.strftime("%d", TaskTemplate.created_at), Integer) == target_date.day,
+        ),
+    ]
+    if weekday < 5:
+        clauses.append(TaskTemplate.repeat_type == RepeatType.DAILY)
+    return or_(*clauses)
+
+
 # ============ Task Template Operations (Admin) ============
 
 def create_template(session: Session, template: TaskTemplateCreate) -> TaskTemplate:
-    db_template = TaskTemplate.model_validate(template)
+    db_template = TaskTemplate(
+        **template.model_dump(exclude={"weekdays"}),
+        weekdays_mask=weekdays_to_mask(template.weekdays),
+    )
     session.add(db_template)
     session.commit()
-    session.refresh(db_template)
     return db_template
 
 
 def get_templates(session: Session, active_only: bool = True) -> list[TaskTemplate]:
-    statement = select(TaskTemplate)
+    statement = lambda_stmt(lambda: select(TaskTemplate))
+    if active_only:
+        statement += lambda s: s.where(TaskTemplate.is_active == True)
+    statement += lambda s: s.order_by(TaskTemplate.order)
+    return session.execute(statement).scalars().all()
+
+
+# Columns read by get_template_rows, in TaskTemplateRead field order
+TEMPLATE_ROW_COLUMNS = (
+    TaskTemplate.title,
+    TaskTemplate.description,
+    TaskTemplate.priority,
+    TaskTemplate.repeat_type,
+    TaskTemplate.order,
+    TaskTemplate.expected_minutes,
+    TaskTemplate.is_active,
+    TaskTemplate.id,
+    TaskTemplate.weekdays_mask,
+    TaskTemplate.created_at,
+    TaskTemplate.updated_at,
+)
+
+
+def get_template_rows(session: Session, active_only: bool = True) -> list[dict]:
+    """Templates as plain dicts shaped like TaskTemplateRead, without ORM objects."""
+    statement = select(*TEMPLATE_ROW_COLUMNS)
     if active_only:
         statement = statement.where(TaskTemplate.is_active == True)
-    statement = statement.order_by(TaskTemplate.order)
-    return session.exec(statement).all()
+    statement = statement.order_by(TaskTemplate.order).execution_options(yield_per=200)
+    rows = []
+    for row in session.exec(statement):
+        data = row._asdict()
+        data["weekdays"] = mask_to_weekdays(data.pop("weekdays_mask"))
+        rows.append(data)
+    return rows
 
 
 def get_template(session: Session, template_id: int) -> TaskTemplate | None:
     return session.get(TaskTemplate, template_id)
 
 
+def get_templates_by_id(session: Session, template_ids: set[int]) -> dict[int, TaskTemplate]:
+    """Load several templates in one IN query, keyed by id."""
+    if not template_ids:
+        return {}
+    statement = select(TaskTemplate).where(TaskTemplate.id.in_(template_ids))
+    return {t.id: t for t in session.exec(statement)}
+
+
 def update_template(
     session: Session, template_id: int, updates: TaskTemplateUpdate
 ) -> TaskTemplate | None:
@@ -83,10 +161,8 @@ def update_template(
     for key, value in update_data.items():
         setattr(template, key, value)
     
-    template.updated_at = datetime.utcnow()
     session.add(template)
     session.commit()
-    session.refresh(template)
     return template
 
 
@@ -103,12 +179,14 @@ def delete_template(session: Session, template_id: int) -> bool:
 
 def get_tasks_for_date(session: Session, target_date: date) -> list[Task]:
     """Get all tasks for a specific date, ordered by priority then order."""
-    statement = (
-        select(Task)
+    # lambda_stmt builds the statement once and reuses it (and its compiled
+    # form) on later calls, binding only the new date
+    statement = lambda_stmt(
+        lambda: select(Task)
         .where(Task.scheduled_date == target_date)
         .order_by(Task.priority, Task.order)
     )
-    return session.exec(statement).all()
+    return session.execute(statement).scalars().all()
 
 
 def get_todays_tasks(session: Session) -> list[Task]:
@@ -122,30 +200,23 @@ def regenerate_tasks_for_date(session: Session, target_date: date) -> list[Task]
     Removes all template-based tasks and regenerates from active templates.
     Preserves one-time (non-template) tasks.
     """
-    # Get existing tasks for this date
-    statement = select(Task).where(Task.scheduled_date == target_date)
-    existing = session.exec(statement).all()
-    
-    # Delete only template-based tasks
-    for task in existing:
-        if task.template_id:
-            session.delete(task)
-    session.commit()
-    
-    # Generate fresh tasks from templates
-    return generate_tasks_for_date(session, target_date)
+    regenerate_tasks_for_range(session, target_date, 1)
+    return get_tasks_for_date(session, target_date)
 
 
-def generate_tasks_for_date(session: Session, target_date: date) -> list[Task]:
+def regenerate_tasks_for_range(session: Session, start: date, days: int) -> int:
     """
-    Generate tasks for a given date based on active templates.
-    Idempotent - won't duplicate tasks from the same template.
+    Clear and regenerate template-based tasks for `days` dates from `start`.
+    Everything happens in one transaction: one DELETE, one template SELECT
+    and one bulk INSERT, however many days are covered.
+    Returns the number of tasks in the range afterwards.
     """
-    # Get existing tasks for this date
-    existing = get_tasks_for_date(session, target_date)
-    existing_template_ids = {t.template_id for t in existing if t.template_id}
+    end = start + timedelta(days=days - 1)
+    in_range = (Task.scheduled_date >= start, Task.scheduled_date <= end)
+    
+    # Delete only template-based tasks
+    session.exec(delete(Task).where(*in_range, Task.template_id.is_not(None)))
     
-    # Get all active templates
     statement = (
         select(TaskTemplate)
         .where(TaskTemplate.is_active == True)
@@ -153,81 +224,102 @@ def generate_tasks_for_date(session: Session, target_date: date) -> list[Task]:
     )
     templates = session.exec(statement).all()
     
-    # Create tasks from matching templates that don't already exist
-    new_tasks = []
-    for template in templates:
-        if template.id in existing_template_ids:
-            continue  # Already have this task
-        if not template_matches_date(template, target_date):
-            continue  # Doesn't match this date
-        
-        task = Task(
-            title=template.title,
-            description=template.description,
-            priority=template.priority,
-            order=template.order,
-            expected_minutes=template.expected_minutes,
-            scheduled_date=target_date,
-            template_id=template.id,
+    rows = []
+    for i in range(days):
+        day = start + timedelta(days=i)
+        rows.extend(
+            _task_values(template, day)
+            for template in templates
+            if template_matches_date(template, day)
         )
-        session.add(task)
-        new_tasks.append(task)
+    if rows:
+        session.bulk_insert_mappings(Task, rows)
+    session.commit()
     
-    if new_tasks:
+    count = select(func.count()).select_from(Task).where(*in_range)
+    return session.exec(count).one()
+
+
+def _task_values(template: TaskTemplate, target_date: date) -> dict:
+    """Column values for a task generated from a template."""
+    return dict(
+        title=template.title,
+        description=template.description,
+        priority=template.priority,
+        order=template.order,
+        expected_minutes=template.expected_minutes,
+        scheduled_date=target_date,
+        template_id=template.id,
+    )
+
+
+def generate_tasks_for_date(session: Session, target_date: date) -> list[Task]:
+    """
+    Generate tasks for a given date based on active templates.
+    Idempotent - won't duplicate tasks from the same template.
+    """
+    # Copy every active template that matches the date and has no task on it
+    # yet in one INSERT ... SELECT; the unique (template_id, scheduled_date)
+    # index plus ON CONFLICT DO NOTHING keeps concurrent callers from doubling up.
+    already_generated = exists().where(
+        Task.template_id == TaskTemplate.id,
+        Task.scheduled_date == target_date,
+    )
+    templates = (
+        select(
+            TaskTemplate.title,
+            TaskTemplate.description,
+            TaskTemplate.priority,
+            TaskTemplate.order,
+            TaskTemplate.expected_minutes,
+            literal(target_date, Date),
+            TaskTemplate.id,
+        )
+        .where(
+            TaskTemplate.is_active == True,
+            repeats_on_clause(target_date),
+            ~already_generated,
+        )
+        .order_by(TaskTemplate.order)
+    )
+    statement = sqlite_insert(Task).from_select(
+        ["title", "description", "priority", "order", "expected_minutes", "scheduled_date", "template_id"],
+        templates,
+    ).on_conflict_do_nothing()
+    if session.execute(statement).rowcount:
         session.commit()
-        for task in new_tasks:
-            session.refresh(task)
     
-    return existing + new_tasks
+    return get_tasks_for_date(session, target_date)
 
 
 def complete_task(session: Session, task_id: int) -> Task | None:
     """Mark a task as completed."""
-    task = session.get(Task, task_id)
-    if not task:
-        return None
-    
-    task.status = TaskStatus.COMPLETED
-    task.completed_at = datetime.utcnow()
-    session.add(task)
-    session.commit()
-    session.refresh(task)
-    return task
+    return update_task(session, task_id, TaskUpdate(status=TaskStatus.COMPLETED))
 
 
 def uncomplete_task(session: Session, task_id: int) -> Task | None:
     """Mark a task as pending (undo completion)."""
-    task = session.get(Task, task_id)
-    if not task:
-        return None
-    
-    task.status = TaskStatus.PENDING
-    task.completed_at = None
-    session.add(task)
-    session.commit()
-    session.refresh(task)
-    return task
+    return update_task(session, task_id, TaskUpdate(status=TaskStatus.PENDING))
 
 
 def update_task(session: Session, task_id: int, updates: TaskUpdate) -> Task | None:
     """Update a task's properties."""
-    task = session.get(Task, task_id)
-    if not task:
-        return None
-    
-    update_data = updates.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(task, key, value)
-    
-    # If status changed to completed, set completed_at
-    if updates.status == TaskStatus.COMPLETED and task.completed_at is None:
-        task.completed_at = datetime.utcnow()
+    values = updates.model_dump(exclude_unset=True)
+    if not values:
+        return session.get(Task, task_id)
+    
+    # If status changed to completed, stamp completed_at in SQLite (keeping
+    # an existing stamp); a pending task has none.
+    if updates.status == TaskStatus.COMPLETED:
+        values["completed_at"] = func.coalesce(Task.completed_at, func.now())
     elif updates.status == TaskStatus.PENDING:
-        task.completed_at = None
+        values["completed_at"] = None
     
-    session.add(task)
+    # One UPDATE ... RETURNING both writes the row and loads the task
+    task = session.exec(
+        update(Task).where(Task.id == task_id).values(**values).returning(Task)
+    ).scalar_one_or_none()
     session.commit()
-    session.refresh(task)
     return task
 
 
@@ -254,11 +346,71 @@ def reorder_task(session: Session, task_id: int, new_order: int) -> Task | None:
         template = session.get(TaskTemplate, task.template_id)
         if template:
             template.order = new_order
-            template.updated_at = datetime.utcnow()
             session.add(template)
     
     session.commit()
-    session.refresh(task)
+    return task
+
+
+def reorder_tasks(session: Session, task_orders: dict[int, int]) -> None:
+    """
+    Reorder many tasks at once. task_orders maps task id -> new order.
+    Uses one UPDATE ... CASE for the tasks (unknown ids are simply not
+    matched) and one for the templates behind template-based tasks.
+    """
+    if not task_orders:
+        return
+    
+    # RETURNING hands back the template ids, so no follow-up SELECT is needed
+    rows = session.exec(
+        update(Task)
+        .where(Task.id.in_(list(task_orders)))
+        .values(order=case(task_orders, value=Task.id))
+        .returning(Task.id, Task.template_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    
+    # Carry the new order over to templates, like reorder_task does
+    template_orders = {
+        template_id: task_orders[task_id]
+        for task_id, template_id in rows
+        if template_id is not None
+    }
+    if template_orders:
+        session.exec(
+            update(TaskTemplate)
+            .where(TaskTemplate.id.in_(list(template_orders)))
+            .values(order=case(template_orders, value=TaskTemplate.id))
+            .execution_options(synchronize_session=False)
+        )
+    
+    session.commit()
+
+
+def _move_template_task(session: Session, task: Task, target_date: date, new_order: int) -> Task:
+    """
+    Move a template task's row to target_date, committing it together with
+    the pending template change. If the template already has a task on that
+    date, the source is deleted and the existing task returned instead, as
+    there can only be one per template per day.
+    """
+    existing = session.exec(
+        select(Task).where(
+            Task.template_id == task.template_id,
+            Task.scheduled_date == target_date,
+            Task.id != task.id,
+        )
+    ).first()
+    if existing:
+        logger.info(f"Template {task.template_id} already has task {existing.id} on {target_date}, deleting source {task.id}")
+        session.delete(task)
+        session.commit()
+        return existing
+    
+    task.scheduled_date = target_date
+    task.order = new_order
+    session.add(task)
+    session.commit()
     return task
 
 
@@ -281,115 +433,52 @@ def move_task_to_date(session: Session, task_id: int, target_date: date, new_ord
     if task.template_id:
         template = session.get(TaskTemplate, task.template_id)
         if template and template.repeat_type == RepeatType.WEEKLY:
-            # Parse current weekdays
-            current_days = set()
-            if template.weekdays:
-                current_days = {int(d) for d in template.weekdays.split(",") if d}
+            source_bit = 1 << source_weekday
+            target_bit = 1 << target_weekday
             
             # Check if target day already exists in template (edge case: moving to existing day)
-            if target_weekday in current_days and source_weekday != target_weekday:
+            if template.weekdays_mask & target_bit and source_weekday != target_weekday:
                 # Target day already has this task - just remove from source day
                 logger.info(f"Target weekday {target_weekday} already in template, just removing source {source_weekday}")
-                current_days.discard(source_weekday)
+                template.weekdays_mask &= ~source_bit
                 
-                if current_days:
-                    template.weekdays = ",".join(str(d) for d in sorted(current_days))
-                else:
+                if not template.weekdays_mask:
                     template.is_active = False
-                    
-                template.updated_at = datetime.utcnow()
-                session.add(template)
-                session.delete(task)
-                session.commit()
-                
-                # Generate/get the task on target date
-                target_tasks = generate_tasks_for_date(session, target_date)
-                for t in target_tasks:
-                    if t.template_id == template.id:
-                        logger.info(f"Returning existing task on target date: id={t.id}")
-                        return t
-                
-                # If we still can't find it, the target date might be outside the current week
-                # Just return a success indicator
-                logger.info(f"Target task for template {template.id} on {target_date} - source deleted successfully")
-                # Create a dummy response - task was successfully moved (source deleted)
-                # Return None and let the caller handle it
-                return None
-            
-            # Normal case: remove source day, add target day
-            current_days.discard(source_weekday)
-            current_days.add(target_weekday)
+            else:
+                # Normal case: remove source day, add target day
+                template.weekdays_mask = (template.weekdays_mask & ~source_bit) | target_bit
+                template.order = new_order
             
-            # Update template
-            template.weekdays = ",".join(str(d) for d in sorted(current_days))
-            template.order = new_order
-            template.updated_at = datetime.utcnow()
             session.add(template)
-            
-            # Delete the old task instance (a new one will be generated for the new day)
-            logger.info(f"Deleting old task {task.id} and generating new one for {target_date}")
-            session.delete(task)
-            session.commit()
-            
-            # Generate task for the new date
-            tasks = generate_tasks_for_date(session, target_date)
-            logger.info(f"Generated {len(tasks)} tasks for {target_date}: {[(t.id, t.title, t.template_id) for t in tasks]}")
-            
-            # Return the newly generated task
-            for t in tasks:
-                if t.template_id == template.id:
-                    logger.info(f"Returning newly generated task: id={t.id}, date={t.scheduled_date}")
-                    return t
-            
-            logger.warning(f"Could not find generated task for template {template.id} on {target_date}")
-            return None
+            return _move_template_task(session, task, target_date, new_order)
         
         elif template and template.repeat_type == RepeatType.DAILY:
             if source_weekday == target_weekday:
                 # Same day, just reorder
                 template.order = new_order
-                template.updated_at = datetime.utcnow()
                 session.add(template)
                 task.order = new_order
                 session.add(task)
                 session.commit()
-                session.refresh(task)
                 return task
             else:
                 # Moving to different day - convert daily to weekly excluding source day
                 logger.info(f"Converting daily template {template.id} to weekly, moving from weekday {source_weekday} to {target_weekday}")
-                remaining_days = {d for d in range(5) if d != source_weekday}
-                remaining_days.add(target_weekday)  # Add target day
-                
                 template.repeat_type = RepeatType.WEEKLY
-                template.weekdays = ",".join(str(d) for d in sorted(remaining_days))
+                template.weekdays_mask = (WORKDAYS_MASK & ~(1 << source_weekday)) | (1 << target_weekday)
                 template.order = new_order
-                template.updated_at = datetime.utcnow()
                 session.add(template)
-                
-                # Delete old task, generate new one
-                logger.info(f"Deleting old task {task.id} and generating new one for {target_date}")
-                session.delete(task)
-                session.commit()
-                
-                # Generate task for the new date
-                tasks = generate_tasks_for_date(session, target_date)
-                logger.info(f"Generated {len(tasks)} tasks for {target_date}")
-                
-                for t in tasks:
-                    if t.template_id == template.id:
-                        logger.info(f"Returning newly generated task: id={t.id}, date={t.scheduled_date}")
-                        return t
-                
-                logger.warning(f"Could not find generated task for template {template.id} on {target_date}")
-                return None
+                return _move_template_task(session, task, target_date, new_order)
     
-    # Non-template task or monthly: just update the task directly
+    if task.template_id:
+        # Monthly: the template is unchanged, but the target may already have its task
+        return _move_template_task(session, task, target_date, new_order)
+    
+    # Non-template task: just update the task directly
     task.scheduled_date = target_date
     task.order = new_order
     session.add(task)
     session.commit()
-    session.refresh(task)
     return task
 
 
@@ -406,7 +495,6 @@ def delete_task_or_template(session: Session, task_id: int, delete_all_occurrenc
         template = session.get(TaskTemplate, task.template_id)
         if template:
             template.is_active = False
-            template.updated_at = datetime.utcnow()
             session.add(template)
     
     session.delete(task)
@@ -421,92 +509,101 @@ def delete_task_with_template_update(session: Session, task_id: int) -> bool:
     - For daily templates: deactivates the template
     - For one-time/monthly or non-template tasks: just deletes the task
     """
-    task = session.get(Task, task_id)
-    if not task:
+    # One DELETE ... RETURNING instead of a SELECT for the task followed by
+    # a unit-of-work delete
+    deleted = session.exec(
+        delete(Task)
+        .where(Task.id == task_id)
+        .returning(Task.template_id, Task.scheduled_date)
+    ).first()
+    if not deleted:
         return False
+    template_id, scheduled_date = deleted
     
-    if task.template_id:
-        template = session.get(TaskTemplate, task.template_id)
+    if template_id:
+        template = session.get(TaskTemplate, template_id)
         if template:
             if template.repeat_type == RepeatType.WEEKLY:
                 # Remove this weekday from template
-                task_weekday = task.scheduled_date.weekday()
-                if template.weekdays:
-                    current_days = {int(d) for d in template.weekdays.split(",") if d}
-                    current_days.discard(task_weekday)
+                if template.weekdays_mask:
+                    remaining_mask = template.weekdays_mask & ~(1 << scheduled_date.weekday())
                     
-                    if current_days:
-                        template.weekdays = ",".join(str(d) for d in sorted(current_days))
+                    if remaining_mask:
+                        template.weekdays_mask = remaining_mask
                     else:
                         # No days left, deactivate template
                         template.is_active = False
                     
-                    template.updated_at = datetime.utcnow()
                     session.add(template)
             
             elif template.repeat_type == RepeatType.DAILY:
                 # Convert daily to weekly, excluding the deleted day
-                task_weekday = task.scheduled_date.weekday()
                 # Daily means Mon-Fri (0-4), so remaining days are all weekdays except deleted one
-                remaining_days = {d for d in range(5) if d != task_weekday}
+                remaining_mask = WORKDAYS_MASK & ~(1 << scheduled_date.weekday())
                 
-                if remaining_days:
+                if remaining_mask:
                     template.repeat_type = RepeatType.WEEKLY
-                    template.weekdays = ",".join(str(d) for d in sorted(remaining_days))
+                    template.weekdays_mask = remaining_mask
                     logger.info(f"Converted daily template {template.id} to weekly on days: {template.weekdays}")
                 else:
                     # Only had one weekday somehow, deactivate
                     template.is_active = False
                 
-                template.updated_at = datetime.utcnow()
                 session.add(template)
             
             elif template.repeat_type == RepeatType.MONTHLY:
                 # Deactivate the monthly template
                 logger.info(f"Deactivating monthly template {template.id}")
                 template.is_active = False
-                template.updated_at = datetime.utcnow()
                 session.add(template)
             
             # For none (one-time), just delete the task
     
-    session.delete(task)
     session.commit()
     return True
 
 
 # ============ End of Day Snapshot ============
 
-def create_daily_snapshot(session: Session, target_date: date) -> list[Task]:
+def create_daily_snapshot(session: Session, target_date: date) -> int:
     """
     Create permanent snapshots of all tasks for a given date.
     Call this at end of day to preserve history.
+    Returns the number of tasks on that date.
     """
-    # Get all tasks for this date
-    tasks = get_tasks_for_date(session, target_date)
-    
-    # Mark all template-generated tasks as snapshots
-    for task in tasks:
-        if task.template_id and not task.is_snapshot:
-            task.is_snapshot = True
-            session.add(task)
-    
+    # Mark all template-generated tasks as snapshots in one statement
+    session.execute(
+        update(Task)
+        .where(
+            Task.scheduled_date == target_date,
+            Task.template_id.is_not(None),
+            Task.is_snapshot == False,
+        )
+        .values(is_snapshot=True)
+    )
     session.commit()
-    return tasks
+    return session.exec(
+        select(func.count()).select_from(Task).where(Task.scheduled_date == target_date)
+    ).one()
 
 
 # ============ History Operations ============
 
 def get_recent_days(session: Session, days: int = 7) -> dict[date, list[Task]]:
     """Get tasks grouped by date for the last N days."""
-    from datetime import timedelta
-    
     today = date.today()
-    result = {}
+    result = {today - timedelta(days=i): [] for i in range(days)}
+    if not result:
+        return result
     
-    for i in range(days):
-        d = today - timedelta(days=i)
-        result[d] = get_tasks_for_date(session, d)
+    # One range scan over ix_task_date_priority_order, bucketed in Python
+    statement = (
+        select(Task)
+        .where(Task.scheduled_date >= today - timedelta(days=days - 1), Task.scheduled_date <= today)
+        .order_by(Task.scheduled_date, Task.priority, Task.order)
+    )
+    for task in session.exec(statement):
+        result[task.scheduled_date].append(task)
     
     return result
 
@@ -0,0 +1,136 @@
+"""
+In-memory static file serving.
+
+The frontend is a handful of small CSS/JS files, so we keep their bytes,
+ETags and compressed variants in memory instead of re-reading (and
+re-compressing) them on every request.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+from email.utils import formatdate
+from functools import lru_cache
+from typing import NamedTuple
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:  # Optional; gzip is always available
+    brotli = None
+
+
+# Types worth compressing; images other than SVG are already compressed
+COMPRESSIBLE_TYPES = {"application/javascript", "application/json", "image/svg+xml", "image/x-icon"}
+
+
+class CachedFile(NamedTuple):
+    body: bytes
+    etag: str
+    media_type: str
+    last_modified: str
+    # Content-Encoding -> compressed body, only where it is actually smaller
+    encoded: dict[str, bytes] = {}
+
+
+def _compress(body: bytes, media_type: str) -> dict[str, bytes]:
+    if not (media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES):
+        return {}
+    encoded = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded["br"] = brotli.compress(body, quality=11)
+    return {encoding: data for encoding, data in encoded.items() if len(data) < len(body)}
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag from the content hash."""
+    return f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+
+@lru_cache(maxsize=128)
+def load_static_file(path: str, mtime_ns: int, size: int) -> CachedFile:
+    """Read a file once per (path, mtime, size); an edited file gets a new entry."""
+    with open(path, "rb") as f:
+        body = f.read()
+    media_type = mimetypes.guess_type(path)[0] or "text/plain"
+    return CachedFile(
+        body=body,
+        etag=make_etag(body),
+        media_type=media_type,
+        last_modified=formatdate(mtime_ns / 1e9, usegmt=True),
+        encoded=_compress(body, media_type),
+    )
+
+
+def _accepted_encodings(accept_encoding: str) -> set[str]:
+    """Codings in an Accept-Encoding header, minus any refused with q=0."""
+    accepted = set()
+    for token in accept_encoding.split(","):
+        coding, *params = (part.strip() for part in token.split(";"))
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0  # Unparseable weight; don't guess the client accepts it
+        if coding and q > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+
+def choose_encoding(cached: CachedFile, accept_encoding: str) -> str | None:
+    """Pick the best cached encoding the client accepts (br over gzip)."""
+    accepted = _accepted_encodings(accept_encoding)
+    for encoding in ("br", "gzip"):
+        if encoding in accepted and encoding in cached.encoded:
+            return encoding
+    return None
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles that serves file contents from an in-memory LRU cache."""
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        cached = load_static_file(str(full_path), stat_result.st_mtime_ns, stat_result.st_size)
+        request_headers = Headers(scope=scope)
+        body, etag = cached.body, cached.etag
+        headers = {"last-modified": cached.last_modified}
+        if cached.encoded:
+            headers["vary"] = "Accept-Encoding"
+            encoding = choose_encoding(cached, request_headers.get("accept-encoding", ""))
+            if encoding:
+                body = cached.encoded[encoding]
+                etag = f'{etag[:-1]}-{encoding}"'  # Each representation needs its own ETag
+                headers["content-encoding"] = encoding
+        headers["etag"] = etag
+        headers["content-length"] = str(len(body))
+        if self.is_not_modified(Headers(headers), request_headers):
+            return NotModifiedResponse(Headers(headers))
+        if scope["method"] == "HEAD":
+            body = b""
+        return Response(body, status_code=status_code, headers=headers, media_type=cached.media_type)
+
+    def warm(self) -> int:
+        """Load every file under the static directories into the cache."""
+        count = 0
+        for directory in self.all_directories:
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    path = os.path.realpath(os.path.join(root, name))
+                    stat_result = os.stat(path)
+                    load_static_file(path, stat_result.st_mtime_ns, stat_result.st_size)
+                    count += 1
+        return count
@@ -2,101 +2,187 @@
 Pytest fixtures for Mimi.Today tests.
 Provides test database, session, and HTTP client.
 """
+import os
+import time
+
+import httpx
 import pytest
-from datetime import date
+from datetime import date, timedelta
+from freezegun import freeze_time
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
 from sqlmodel import SQLModel, Session, create_engine
 from starlette.testclient import TestClient
 
+# Import the app before freeze_time patches `date`, or its route models see FakeDate
 from app.main import app
-from app.database import get_session
+from app.database import get_session, get_ro_session, set_sqlite_pragmas
+from app.response_cache import task_list_cache, template_list_cache
 from app.models import Task, TaskTemplate, TaskPriority, TaskStatus, RepeatType
 
 
-# Test database - file-based SQLite for shared access between session and client
-TEST_DATABASE_URL = "sqlite:///./test_mimi.db"
+# Test database - in-memory SQLite. StaticPool hands every session (the
+# fixtures' and the test client's) the same connection, so they all see one
+# database and nothing touches the disk.
+TEST_DATABASE_URL = "sqlite://"
+
+# Every test runs on this day (a Monday), so "today" fixtures and the
+# hardcoded 2025-12-29 week in the move tests always line up.
+TODAY = date(2025, 12, 29)
+TODAY_ISO = TODAY.isoformat()
+MONDAY = TODAY - timedelta(days=TODAY.weekday())  # Start of TODAY's week
+TUESDAY, WEDNESDAY, THURSDAY, FRIDAY, SATURDAY, SUNDAY = (MONDAY + timedelta(days=n) for n in range(1, 7))
+
+
+def weekday_set(weekdays: str) -> set[int]:
+    """Parse a template's "0,2,4" weekdays string into day numbers."""
+    return {int(d) for d in weekdays.split(",") if d}
+
+
+def _sqlite_connect(dbapi_connection, connection_record):
+    # Let SQLAlchemy, not pysqlite, issue BEGIN so SAVEPOINTs nest properly
+    dbapi_connection.isolation_level = None
+    # Same connection settings as the app (WAL is a no-op in memory)
+    set_sqlite_pragmas(dbapi_connection, connection_record)
+
+
+def _sqlite_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
 
+@pytest.fixture(autouse=True, scope="session")
+def frozen_today():
+    """Pin date.today() for the whole run; the clock still ticks within the day."""
+    # SQLAlchemy builds result datetimes, which must stay real for orjson, and
+    # the response cache's monotonic TTL is read from both the test and the
+    # server thread, so both keep the real clock. pytest keeps it too, or
+    # --durations reports the frozen offset as setup time.
+    with freeze_time(TODAY, tick=True, ignore=["_pytest", "sqlalchemy", "app.response_cache"]):
+        yield
 
-@pytest.fixture(name="engine", scope="function")
+
+@pytest.fixture(name="engine", scope="session")
 def engine_fixture():
-    """Create a fresh database for each test."""
-    import os
-    # Remove old test db if exists
-    if os.path.exists("test_mimi.db"):
-        os.remove("test_mimi.db")
-    
+    """Create the test database and schema once for the whole run."""
     engine = create_engine(
         TEST_DATABASE_URL,
-        connect_args={"check_same_thread": False}
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
     )
+    event.listen(engine, "connect", _sqlite_connect)
+    event.listen(engine, "begin", _sqlite_begin)
     SQLModel.metadata.create_all(engine)
     yield engine
     
-    # Cleanup
-    SQLModel.metadata.drop_all(engine)
     engine.dispose()
-    if os.path.exists("test_mimi.db"):
-        os.remove("test_mimi.db")
+
+
+@pytest.fixture(name="connection")
+def connection_fixture(engine):
+    """
+    A connection inside a transaction that is rolled back after the test.
+    Sessions bound to it turn their commits into SAVEPOINT releases, so
+    every test starts from an empty database without recreating tables.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    yield connection
+    transaction.rollback()
+    connection.close()
+
+
+def _make_session(connection, **kwargs) -> Session:
+    """Session that joins the test's outer transaction via SAVEPOINTs."""
+    return Session(bind=connection, join_transaction_mode="create_savepoint", **kwargs)
 
 
 @pytest.fixture(name="session")
-def session_fixture(engine):
+def session_fixture(connection):
     """Create a database session for testing."""
-    with Session(engine) as session:
+    with _make_session(connection) as session:
         yield session
 
 
+@pytest.fixture(name="test_client", scope="session")
+def test_client_fixture():
+    """One TestClient for the whole run; tests only swap the session overrides."""
+    return TestClient(app, raise_server_exceptions=False)
+
+
 @pytest.fixture(name="client")
-def client_fixture(engine, session):
-    """Create a test client with the test database."""
+def client_fixture(test_client, connection, session):
+    """Point the shared test client at this test's database."""
     def get_test_session():
-        # Use the same engine for the test client
-        with Session(engine) as s:
+        # Use the test's connection for the client, configured like get_session
+        with _make_session(connection, expire_on_commit=False) as s:
             yield s
     
     app.dependency_overrides[get_session] = get_test_session
-    client = TestClient(app, raise_server_exceptions=False)
-    yield client
+    app.dependency_overrides[get_ro_session] = get_test_session
+    # Cached bodies belong to the previous test's database
+    task_list_cache.clear()
+    template_list_cache.clear()
+    yield test_client
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def assert_task_order(session):
+    """Check a task's stored order straight from the database, without a GET."""
+    def check(task_id: int, expected: int) -> None:
+        session.expire_all()  # Pick up what the client's sessions committed
+        assert session.get(Task, task_id).order == expected
+    return check
+
+
 # ============ Sample Data Fixtures ============
 
 @pytest.fixture
-def sample_template(session) -> TaskTemplate:
-    """Create a sample weekly task template."""
-    template = TaskTemplate(
+def sample_template_obj() -> TaskTemplate:
+    """The sample weekly template, not added to the database (for pure-logic tests)."""
+    return TaskTemplate(
         title="Clean Kitchen",
         description="Weekly kitchen cleaning",
         priority=TaskPriority.REQUIRED,
         repeat_type=RepeatType.WEEKLY,
-        weekdays="0,2,4",  # Mon, Wed, Fri
+        weekdays_mask=0b10101,  # Mon, Wed, Fri
         order=0,
         expected_minutes=45,
         is_active=True,
     )
-    session.add(template)
-    session.commit()
-    session.refresh(template)
-    return template
 
 
 @pytest.fixture
-def sample_daily_template(session) -> TaskTemplate:
-    """Create a sample daily task template."""
-    template = TaskTemplate(
+def sample_daily_template_obj() -> TaskTemplate:
+    """The sample daily template, not added to the database (for pure-logic tests)."""
+    return TaskTemplate(
         title="Vacuum Living Room",
         description="Daily vacuuming",
         priority=TaskPriority.OPTIONAL,
         repeat_type=RepeatType.DAILY,
-        weekdays="",
+        weekdays_mask=0,
         order=1,
         expected_minutes=20,
         is_active=True,
     )
-    session.add(template)
+
+
+@pytest.fixture
+def sample_template(session, sample_template_obj) -> TaskTemplate:
+    """Create a sample weekly task template."""
+    session.add(sample_template_obj)
+    session.commit()
+    session.refresh(sample_template_obj)
+    return sample_template_obj
+
+
+@pytest.fixture
+def sample_daily_template(session, sample_daily_template_obj) -> TaskTemplate:
+    """Create a sample daily task template."""
+    session.add(sample_daily_template_obj)
     session.commit()
-    session.refresh(template)
-    return template
+    session.refresh(sample_daily_template_obj)
+    return sample_daily_template_obj
 
 
 @pytest.fixture
@@ -108,7 +194,7 @@ def sample_task(session) -> Task:
         priority=TaskPriority.REQUIRED,
         order=0,
         expected_minutes=15,
-        scheduled_date=date.today(),
+        scheduled_date=TODAY,
         status=TaskStatus.PENDING,
         template_id=None,
         is_snapshot=False,
@@ -128,7 +214,7 @@ def sample_completed_task(session) -> Task:
         priority=TaskPriority.OPTIONAL,
         order=1,
         expected_minutes=10,
-        scheduled_date=date.today(),
+        scheduled_date=TODAY,
         status=TaskStatus.COMPLETED,
         completed_at=datetime.utcnow(),
         template_id=None,
@@ -139,3 +225,123 @@ def sample_completed_task(session) -> Task:
     session.refresh(task)
     return task
 
+
+def _template_task(session, template: TaskTemplate, scheduled_date: date) -> Task:
+    """Insert the task generation would create for template on scheduled_date."""
+    task = Task(
+        title=template.title,
+        description=template.description,
+        priority=template.priority,
+        order=template.order,
+        expected_minutes=template.expected_minutes,
+        scheduled_date=scheduled_date,
+        template_id=template.id,
+    )
+    session.add(task)
+    session.commit()
+    session.refresh(task)
+    return task
+
+
+@pytest.fixture
+def template_task(session):
+    """Factory for a template's already-generated task on a given date."""
+    def make(template: TaskTemplate, scheduled_date: date) -> Task:
+        return _template_task(session, template, scheduled_date)
+    return make
+
+
+@pytest.fixture
+def monday_task(session, sample_template) -> Task:
+    """sample_template's task on MONDAY, as if already generated."""
+    return _template_task(session, sample_template, MONDAY)
+
+
+@pytest.fixture
+def monday_daily_task(session, sample_daily_template) -> Task:
+    """sample_daily_template's task on MONDAY, as if already generated."""
+    return _template_task(session, sample_daily_template, MONDAY)
+
+
+# ============ E2E Fixtures ============
+
+# The E2E server is local, so actions and assertions that haven't
+# succeeded in this long have failed; don't sit out Playwright's 30s default.
+E2E_TIMEOUT_MS = 5_000
+
+
+@pytest.fixture(scope="session")
+def browser_type_launch_args(browser_type_launch_args):
+    """
+    Container-friendly Chromium flags: CI's /dev/shm is often only 64MB, and
+    the sandbox only slows startup for a browser that loads our own pages.
+    """
+    return {
+        **browser_type_launch_args,
+        "args": [*browser_type_launch_args.get("args", []), "--disable-dev-shm-usage", "--disable-gpu"],
+        "chromium_sandbox": False,
+    }
+
+
+@pytest.fixture
+def context(context):
+    """pytest-playwright's browser context, with the shorter E2E timeout."""
+    context.set_default_timeout(E2E_TIMEOUT_MS)
+    return context
+
+
+@pytest.fixture
+def run_tag() -> str:
+    """
+    Suffix for titles an E2E test creates. Includes the xdist worker id, so
+    tests running in parallel against the same server never match each
+    other's tasks.
+    """
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+    return f"w{worker}-{int(time.time() * 1000)}"
+
+
+@pytest.fixture
+def seed_task(page, base_url):
+    """
+    Create tasks through the API for E2E tests that aren't about the create
+    flow. Tasks land on the browser's today, the day the pages open on, and
+    are deleted again after the test.
+    """
+    # Same date string the frontend builds its requests from
+    today = page.evaluate("new Date().toISOString().split('T')[0]")
+    created = []
+    with httpx.Client(base_url=base_url) as http:
+        def seed(title: str, **fields) -> dict:
+            response = http.post("/api/admin/tasks", json={"title": title, "scheduled_date": today, **fields})
+            response.raise_for_status()
+            task = response.json()
+            created.append(task["id"])
+            return task
+        yield seed
+        for task_id in created:
+            http.delete(f"/api/admin/tasks/{task_id}")  # 404 if the test deleted it
+
+
+def _fulfill_empty_list(route) -> None:
+    route.fulfill(status=200, content_type="application/json", body="[]")
+
+
+@pytest.fixture(scope="class")
+def shared_context(browser, browser_context_args):
+    """
+    One browser context for all the read-only E2E tests in a class. Task
+    lists are answered in the browser with an empty list, so these tests
+    neither wait on the server's task queries nor see tasks other tests made.
+    """
+    context = browser.new_context(**browser_context_args)
+    context.set_default_timeout(E2E_TIMEOUT_MS)
+    context.route("**/api/tasks/**", _fulfill_empty_list)
+    yield context
+    context.close()
+
+
+@pytest.fixture(scope="class")
+def shared_page(shared_context):
+    """A page in shared_context, reused across the class's read-only tests."""
+    return shared_context.new_page()
@@ -2,7 +2,8 @@
 Tests for admin API endpoints (Ilse's panel).
 """
 import pytest
-from datetime import date
+
+from tests.conftest import FRIDAY, MONDAY, TODAY_ISO, WEDNESDAY, weekday_set
 
 
 class TestTemplateEndpoints:
@@ -20,6 +21,21 @@ class TestTemplateEndpoints:
         assert response.status_code == 200
         data = response.json()
         assert len(data) == 2
+        weekly = next(t for t in data if t["id"] == sample_template.id)
+        assert weekly["priority"] == "required"
+        assert weekly["repeat_type"] == "weekly"
+        assert weekly["weekdays"] == "0,2,4"
+        assert weekly["created_at"]
+    
+    def test_template_list_cache_invalidated_by_writes(self, client, sample_template):
+        """The cached template list is rebuilt after a template is created."""
+        first = client.get("/api/admin/templates")
+        assert client.get("/api/admin/templates").content == first.content
+        
+        client.post("/api/admin/templates", json={"title": "Fresh", "priority": "optional"})
+        titles = {t["title"] for t in client.get("/api/admin/templates").json()}
+        
+        assert "Fresh" in titles
     
     def test_create_template(self, client):
         """Should create a new template."""
@@ -48,11 +64,6 @@ class TestTemplateEndpoints:
         assert response.status_code == 200
         assert response.json()["title"] == "Clean Kitchen"
     
-    def test_get_nonexistent_template(self, client):
-        """Should return 404 for nonexistent template."""
-        response = client.get("/api/admin/templates/9999")
-        assert response.status_code == 404
-    
     def test_update_template(self, client, sample_template):
         """Should update a template."""
         response = client.patch(
@@ -67,8 +78,8 @@ class TestTemplateEndpoints:
         """Should delete a template."""
         response = client.delete(f"/api/admin/templates/{sample_template.id}")
         
-        assert response.status_code == 200
-        assert response.json()["ok"] is True
+        assert response.status_code == 204
+        assert response.content == b""
         
         # Verify it's gone
         response = client.get(f"/api/admin/templates/{sample_template.id}")
@@ -96,19 +107,37 @@ class TestTaskEndpoints:
         assert data["title"] == "Ad-hoc Task"
         assert data["template_id"] is None
         assert data["scheduled_date"] == "2025-12-31"
-    
+
+    def test_create_tasks_bulk(self, client):
+        """Should create several ad-hoc tasks in one request, in order."""
+        response = client.post(
+            "/api/admin/tasks/bulk",
+            json=[
+                {"title": "First", "priority": "optional", "order": 0, "scheduled_date": "2025-12-31"},
+                {"title": "Second", "priority": "required", "order": 1, "scheduled_date": "2025-12-31"},
+            ]
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [t["title"] for t in data] == ["First", "Second"]
+        assert all(t["id"] is not None and t["template_id"] is None for t in data)
+
+        listed = client.get("/api/tasks/date/2025-12-31").json()
+        assert {t["title"] for t in listed} == {"First", "Second"}
+
     def test_delete_task(self, client, sample_task):
         """Should delete a task."""
         response = client.delete(f"/api/admin/tasks/{sample_task.id}")
         
-        assert response.status_code == 200
-        assert response.json()["ok"] is True
+        assert response.status_code == 204
+        assert response.content == b""
 
 
 class TestTaskReordering:
     """Tests for task reordering endpoints."""
     
-    def test_reorder_tasks(self, client, sample_task, sample_completed_task):
+    def test_reorder_tasks(self, client, sample_task, sample_completed_task, assert_task_order):
         """Should reorder multiple tasks."""
         response = client.post(
             "/api/admin/tasks/reorder",
@@ -118,19 +147,12 @@ class TestTaskReordering:
             ]
         )
         
-        assert response.status_code == 200
-        assert response.json()["ok"] is True
+        assert response.status_code == 204
+        assert response.content == b""
         
         # Verify order changed
-        today = date.today().isoformat()
-        tasks_response = client.get(f"/api/tasks/date/{today}")
-        tasks = tasks_response.json()
-        
-        task1 = next(t for t in tasks if t["id"] == sample_task.id)
-        task2 = next(t for t in tasks if t["id"] == sample_completed_task.id)
-        
-        assert task1["order"] == 5
-        assert task2["order"] == 3
+        assert_task_order(sample_task.id, 5)
+        assert_task_order(sample_completed_task.id, 3)
 
 
 class TestTaskMoving:
@@ -145,12 +167,19 @@ class TestTaskMoving:
         
         assert response.status_code == 200
         assert response.json()["scheduled_date"] == new_date
+
+
+class TestMissingResources:
+    """Admin endpoints answer 404 for unknown ids."""
     
-    def test_move_nonexistent_task(self, client):
-        """Should return 404 for nonexistent task."""
-        response = client.post(
-            "/api/admin/tasks/9999/move?target_date=2026-01-15&order=0"
-        )
+    @pytest.mark.parametrize("method,url", [
+        ("GET", "/api/admin/templates/9999"),
+        ("DELETE", "/api/admin/templates/9999"),
+        ("DELETE", "/api/admin/tasks/9999"),
+        ("POST", "/api/admin/tasks/9999/move?target_date=2026-01-15&order=0"),
+    ])
+    def test_returns_404(self, client, method, url):
+        response = client.request(method, url)
         assert response.status_code == 404
 
 
@@ -160,7 +189,7 @@ class TestTaskGeneration:
     def test_generate_tasks_for_date(self, client, sample_template):
         """Should generate tasks from templates."""
         # Monday - matches weekly template
-        response = client.post("/api/admin/generate/2025-12-29")
+        response = client.post(f"/api/admin/generate/{MONDAY}")
         
         assert response.status_code == 200
         data = response.json()
@@ -172,7 +201,12 @@ class TestTaskGeneration:
         response = client.post("/api/admin/generate/today")
         
         assert response.status_code == 200
-        # Result depends on what day it is
+        data = response.json()
+        # Today is the frozen Monday, so only the daily template fires
+        assert len(data) == 1
+        assert data[0]["template_id"] == sample_daily_template.id
+        assert data[0]["title"] == "Vacuum Living Room"
+        assert data[0]["scheduled_date"] == TODAY_ISO
 
 
 class TestSnapshot:
@@ -180,8 +214,7 @@ class TestSnapshot:
     
     def test_create_snapshot(self, client, sample_task):
         """Should create snapshot for a date."""
-        today = date.today().isoformat()
-        response = client.post(f"/api/admin/snapshot/{today}")
+        response = client.post(f"/api/admin/snapshot/{TODAY_ISO}")
         
         assert response.status_code == 200
         data = response.json()
@@ -192,60 +225,51 @@ class TestSnapshot:
 class TestDeleteTemplateTasks:
     """Tests for deleting template-based tasks."""
     
-    def test_delete_template_task_prevents_regeneration(self, client, sample_template):
+    def test_delete_template_task_prevents_regeneration(self, client, sample_template, monday_task):
         """Deleting a template-based task should prevent it from regenerating."""
-        # Generate task for Monday (2025-12-29)
-        gen_response = client.post("/api/admin/generate/2025-12-29")
-        assert gen_response.status_code == 200
-        tasks = gen_response.json()
-        assert len(tasks) == 1
-        task_id = tasks[0]["id"]
+        task_id = monday_task.id
         
         # Delete the task
         del_response = client.delete(f"/api/admin/tasks/{task_id}")
-        assert del_response.status_code == 200
+        assert del_response.status_code == 204
         
         # Try to get tasks for that date again - should NOT regenerate
-        get_response = client.get("/api/tasks/date/2025-12-29")
+        get_response = client.get(f"/api/tasks/date/{MONDAY}")
         tasks_after = get_response.json()
         
         # The task should NOT have been regenerated
         assert len(tasks_after) == 0, "Template-based task was regenerated after deletion!"
     
-    def test_delete_weekly_task_removes_day_from_template(self, client, sample_template):
+    @pytest.mark.parametrize("weekday,day", [
+        (0, MONDAY),
+        (2, WEDNESDAY),
+        (4, FRIDAY),
+    ])
+    def test_delete_weekly_task_removes_day_from_template(
+        self, client, sample_template, template_task, weekday, day
+    ):
         """Deleting a weekly task should remove that day from template's weekdays."""
-        # Generate task for Monday (weekday 0)
-        gen_response = client.post("/api/admin/generate/2025-12-29")
-        assert gen_response.status_code == 200
-        tasks = gen_response.json()
-        task_id = tasks[0]["id"]
+        task_id = template_task(sample_template, day).id
         
         # Delete the task
         del_response = client.delete(f"/api/admin/tasks/{task_id}")
-        assert del_response.status_code == 200
+        assert del_response.status_code == 204
         
-        # Check template - Monday should be removed from weekdays
+        # Check template - the task's weekday should be removed from weekdays
         template_response = client.get(f"/api/admin/templates/{sample_template.id}")
         template = template_response.json()
         
         # Original weekdays: "0,2,4" (Mon, Wed, Fri)
-        # After delete: should be "2,4" (Wed, Fri)
-        assert "0" not in template["weekdays"], "Monday was not removed from template weekdays!"
+        expected = ",".join(str(d) for d in (0, 2, 4) if d != weekday)
+        assert template["weekdays"] == expected
     
-    def test_delete_daily_task_converts_to_weekly(self, client, sample_daily_template):
+    def test_delete_daily_task_converts_to_weekly(self, client, sample_daily_template, monday_daily_task):
         """Deleting a daily task should convert template to weekly on remaining days."""
-        # Generate task for Monday (2025-12-29, weekday 0)
-        gen_response = client.post("/api/admin/generate/2025-12-29")
-        assert gen_response.status_code == 200
-        tasks = gen_response.json()
-        
-        # Find the daily task
-        daily_task = [t for t in tasks if t["title"] == "Vacuum Living Room"][0]
-        task_id = daily_task["id"]
+        task_id = monday_daily_task.id
         
         # Delete the task
         del_response = client.delete(f"/api/admin/tasks/{task_id}")
-        assert del_response.status_code == 200
+        assert del_response.status_code == 204
         
         # Check template - should be converted to weekly, excluding Monday
         template_response = client.get(f"/api/admin/templates/{sample_daily_template.id}")
@@ -254,44 +278,38 @@ class TestDeleteTemplateTasks:
         # Should now be WEEKLY instead of DAILY
         assert template["repeat_type"] == "weekly", "Template should be converted to weekly!"
         # Should have weekdays 1,2,3,4 (Tue, Wed, Thu, Fri) - Monday (0) excluded
-        weekdays = set(template["weekdays"].split(","))
-        assert "0" not in weekdays, "Monday should be excluded from weekdays!"
-        assert weekdays == {"1", "2", "3", "4"}, f"Expected Tue-Fri, got {weekdays}"
+        weekdays = weekday_set(template["weekdays"])
+        assert 0 not in weekdays, "Monday should be excluded from weekdays!"
+        assert weekdays == {1, 2, 3, 4}, f"Expected Tue-Fri, got {weekdays}"
 
 
 class TestMoveTemplateTasks:
     """Tests for moving template-based tasks."""
     
-    def test_move_weekly_task_updates_template_weekdays(self, client, sample_template):
+    def test_move_weekly_task_updates_template_weekdays(
+        self, client, session, sample_template, monday_task, assert_task_order
+    ):
         """Moving a weekly task should update the template's weekdays and persist."""
-        # Generate task for Monday (2025-12-29, weekday 0)
-        gen_response = client.post("/api/admin/generate/2025-12-29")
-        assert gen_response.status_code == 200
-        tasks = gen_response.json()
-        task_id = tasks[0]["id"]
+        task_id = monday_task.id
         
         # Move to Thursday (2026-01-01, weekday 3)
         move_response = client.post(
-            f"/api/admin/tasks/{task_id}/move?target_date=2026-01-01&order=0"
+            f"/api/admin/tasks/{task_id}/move?target_date=2026-01-01&order=2"
         )
         assert move_response.status_code == 200
+        assert_task_order(task_id, 2)
         
         # Check template weekdays - should now include Thursday, not Monday
-        template_response = client.get(f"/api/admin/templates/{sample_template.id}")
-        template = template_response.json()
+        session.refresh(sample_template)
         
         # Original: "0,2,4" (Mon, Wed, Fri)
         # After move: should be "2,3,4" (Wed, Thu, Fri)
-        assert "3" in template["weekdays"], "Thursday was not added to template weekdays!"
-        assert "0" not in template["weekdays"], "Monday was not removed from template weekdays!"
+        # Monday swapped for Thursday; Wednesday and Friday untouched
+        assert weekday_set(sample_template.weekdays) == {2, 3, 4}
     
-    def test_move_weekly_task_does_not_reappear_on_original_date(self, client, sample_template):
+    def test_move_weekly_task_does_not_reappear_on_original_date(self, client, sample_template, monday_task):
         """After moving a weekly task, it should not reappear on the original date."""
-        # Generate task for Monday (2025-12-29)
-        gen_response = client.post("/api/admin/generate/2025-12-29")
-        assert gen_response.status_code == 200
-        tasks = gen_response.json()
-        task_id = tasks[0]["id"]
+        task_id = monday_task.id
         
         # Move to Tuesday (2025-12-30, weekday 1)
         move_response = client.post(
@@ -300,7 +318,7 @@ class TestMoveTemplateTasks:
         assert move_response.status_code == 200
         
         # Get tasks for original date (Monday) - should be empty
-        mon_response = client.get("/api/tasks/date/2025-12-29")
+        mon_response = client.get(f"/api/tasks/date/{MONDAY}")
         mon_tasks = mon_response.json()
         assert len(mon_tasks) == 0, "Task reappeared on original date after move!"
         
@@ -317,11 +335,11 @@ class TestPageEndpoints:
         """Mimi's page should load."""
         response = client.get("/")
         assert response.status_code == 200
-        assert "Mimi.Today" in response.text
+        assert b"Mimi.Today" in response.content
     
     def test_admin_page_loads(self, client):
         """Admin page should load."""
         response = client.get("/admin")
         assert response.status_code == 200
-        assert "Ilse.Admin" in response.text
+        assert b"Ilse.Admin" in response.content
 
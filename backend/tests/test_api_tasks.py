@@ -2,7 +2,8 @@
 Tests for task API endpoints (Mimi's view).
 """
 import pytest
-from datetime import date
+
+from tests.conftest import MONDAY, TODAY, TODAY_ISO
 
 
 class TestHealthEndpoint:
@@ -28,8 +29,7 @@ class TestGetTasks:
     
     def test_get_tasks_for_date(self, client, sample_task):
         """Should return tasks for a specific date."""
-        today = date.today().isoformat()
-        response = client.get(f"/api/tasks/date/{today}")
+        response = client.get(f"/api/tasks/date/{TODAY_ISO}")
         
         assert response.status_code == 200
         data = response.json()
@@ -39,7 +39,7 @@ class TestGetTasks:
     def test_get_tasks_includes_repeat_info(self, client, sample_template):
         """Tasks from templates should include repeat_info."""
         # Monday - matches the weekly template
-        response = client.get("/api/tasks/date/2025-12-29")
+        response = client.get(f"/api/tasks/date/{MONDAY}")
         
         assert response.status_code == 200
         data = response.json()
@@ -58,6 +58,28 @@ class TestGetTasks:
         assert len(data) == 1
 
 
+class TestTaskListCache:
+    """Tests for the cached task-list responses."""
+    
+    def test_repeat_get_served_from_cache(self, client, sample_task):
+        """A second read of the same date returns the cached body."""
+        from app.response_cache import task_list_cache
+        
+        first = client.get("/api/tasks/today")
+        
+        assert task_list_cache.get(f"tasks:{TODAY}") == first.content
+        assert client.get("/api/tasks/today").content == first.content
+    
+    def test_write_invalidates_cache(self, client, sample_task):
+        """Completing a task is visible on the next read."""
+        client.get("/api/tasks/today")
+        
+        client.post(f"/api/tasks/{sample_task.id}/complete")
+        data = client.get("/api/tasks/today").json()
+        
+        assert data[0]["status"] == "completed"
+
+
 class TestCompleteTask:
     """Tests for task completion endpoints."""
     
@@ -70,11 +92,6 @@ class TestCompleteTask:
         assert data["status"] == "completed"
         assert data["completed_at"] is not None
     
-    def test_complete_nonexistent_task(self, client):
-        """Should return 404 for nonexistent task."""
-        response = client.post("/api/tasks/9999/complete")
-        assert response.status_code == 404
-    
     def test_uncomplete_task(self, client, sample_completed_task):
         """Should mark completed task as pending."""
         response = client.post(f"/api/tasks/{sample_completed_task.id}/uncomplete")
@@ -88,25 +105,26 @@ class TestCompleteTask:
 class TestUpdateTask:
     """Tests for task update endpoint."""
     
-    def test_update_task_title(self, client, sample_task):
-        """Should update task title."""
-        response = client.patch(
-            f"/api/tasks/{sample_task.id}",
-            json={"title": "New Title"}
-        )
+    @pytest.mark.parametrize("field,value", [("title", "New Title"), ("priority", "optional")])
+    def test_update_task_field(self, client, sample_task, field, value):
+        """Should update a single task property."""
+        response = client.patch(f"/api/tasks/{sample_task.id}", json={field: value})
         
         assert response.status_code == 200
-        assert response.json()["title"] == "New Title"
+        assert response.json()[field] == value
+
+
+class TestMissingTask:
+    """Task endpoints answer 404 for unknown ids."""
     
-    def test_update_task_priority(self, client, sample_task):
-        """Should update task priority."""
-        response = client.patch(
-            f"/api/tasks/{sample_task.id}",
-            json={"priority": "optional"}
-        )
-        
-        assert response.status_code == 200
-        assert response.json()["priority"] == "optional"
+    @pytest.mark.parametrize("method,url,body", [
+        ("POST", "/api/tasks/9999/complete", None),
+        ("POST", "/api/tasks/9999/uncomplete", None),
+        ("PATCH", "/api/tasks/9999", {"title": "Nope"}),
+    ])
+    def test_returns_404(self, client, method, url, body):
+        response = client.request(method, url, json=body)
+        assert response.status_code == 404
 
 
 class TestTaskHistory:
@@ -120,7 +138,6 @@ class TestTaskHistory:
         data = response.json()
         
         # Should have today's date as a key
-        today = date.today().isoformat()
-        assert today in data
-        assert len(data[today]) == 2
+        assert TODAY_ISO in data
+        assert len(data[TODAY_ISO]) == 2
 
@@ -4,131 +4,148 @@ Tests the full UI interaction with the real backend.
 
 Run with: pytest tests/test_e2e.py --headed  (to see the browser)
 Or: pytest tests/test_e2e.py  (headless, faster)
+Or: pytest tests/test_e2e.py -n auto --dist loadgroup  (one browser per worker)
+
+Tests that change data other tests look at are kept on one worker with
+@pytest.mark.xdist_group("mutating").
 
 Note: The server must be running on localhost:8001 before running these tests.
 """
+import re
+
+import httpx
 import pytest
 from playwright.sync_api import Page, expect
-import time
+
+from tests.conftest import E2E_TIMEOUT_MS
 
 
 # Base URL for tests
 BASE_URL = "http://localhost:8001"
 
+# Sync regenerates the whole week, which can outlast the default timeout
+SYNC_TIMEOUT_MS = 15_000
+
+expect.set_options(timeout=E2E_TIMEOUT_MS)
+
+
+def _goto_admin(page: Page) -> None:
+    """Open the admin page and wait until the week has rendered."""
+    page.goto(f"{BASE_URL}/admin")
+    expect(page.locator(".day-panel")).to_have_count(7)
+
+
+def _goto_client(page: Page) -> None:
+    """Open Mimi's view and wait until today's tasks have loaded."""
+    with page.expect_response("**/api/tasks/date/*"):
+        page.goto(BASE_URL)
+    expect(page.locator(".date-label h1")).to_be_visible()
+
 
 class TestAdminUI:
     """E2E tests for the admin interface."""
 
-    def test_admin_page_loads(self, page: Page):
+    def test_admin_page_loads(self, shared_page: Page):
         """Admin page loads with day panels."""
-        page.goto(f"{BASE_URL}/admin")
+        shared_page.goto(f"{BASE_URL}/admin")
         
         # Should see the header
-        expect(page.locator("h1")).to_have_text("Ilse.Admin")
+        expect(shared_page.locator("h1")).to_have_text("Ilse.Admin")
         
         # Should see day panels (Mon-Sun)
-        expect(page.locator(".day-panel")).to_have_count(7)
+        expect(shared_page.locator(".day-panel")).to_have_count(7)
         
         # Should see day dots for navigation
-        expect(page.locator(".day-dot")).to_have_count(7)
+        expect(shared_page.locator(".day-dot")).to_have_count(7)
 
-    def test_create_one_time_task(self, page: Page):
+    def test_create_one_time_task(self, page: Page, run_tag: str):
         """Create a one-time task and verify it appears."""
-        page.goto(f"{BASE_URL}/admin")
-        page.wait_for_load_state("networkidle")
+        _goto_admin(page)
         
         # Click the first + button (insert at top of first day)
         page.locator(".insert-btn button").first.click()
         
         # Wait for modal
-        expect(page.locator(".modal")).to_be_visible()
+        modal = page.locator(".modal")
+        expect(modal).to_be_visible()
         
         # Fill in task title
-        task_title = f"E2E Test Task {int(time.time())}"
-        page.fill('input[placeholder="Task title"]', task_title)
+        task_title = f"E2E Test Task {run_tag}"
+        page.get_by_placeholder("Task title").fill(task_title)
         
         # Don't check any repeat options (one-time task)
         # Click Create
-        page.click('button:has-text("Create")')
+        page.get_by_role("button", name="Create", exact=True).click()
         
         # Wait for modal to close
-        expect(page.locator(".modal")).not_to_be_visible()
+        expect(modal).not_to_be_visible()
         
         # Verify task appears
-        page.wait_for_timeout(500)  # Wait for reload
-        expect(page.locator(f".admin-task-title:has-text('{task_title}')")).to_be_visible()
+        task_locator = page.locator(f".admin-task-title:has-text('{task_title}')")
+        expect(task_locator).to_be_visible()
         
         # Reload and verify persistence
         page.reload()
-        page.wait_for_load_state("networkidle")
-        expect(page.locator(f".admin-task-title:has-text('{task_title}')")).to_be_visible()
+        expect(task_locator).to_be_visible()
 
-    def test_create_weekly_task(self, page: Page):
+    def test_create_weekly_task(self, page: Page, run_tag: str):
         """Create a weekly recurring task."""
-        page.goto(f"{BASE_URL}/admin")
-        page.wait_for_load_state("networkidle")
+        _goto_admin(page)
         
         # Click + button
         page.locator(".insert-btn button").first.click()
-        expect(page.locator(".modal")).to_be_visible()
+        modal = page.locator(".modal")
+        expect(modal).to_be_visible()
         
-        task_title = f"E2E Weekly {int(time.time())}"
-        page.fill('input[placeholder="Task title"]', task_title)
+        task_title = f"E2E Weekly {run_tag}"
+        page.get_by_placeholder("Task title").fill(task_title)
         
         # Check weekly repeat
-        page.locator('input[type="checkbox"]').nth(1).check()  # Weekly checkbox
+        page.get_by_label("Weekly on:").check()
         
         # Select Mon and Wed
-        page.wait_for_timeout(200)
-        page.locator(".day-btn:has-text('Mon')").click()
-        page.locator(".day-btn:has-text('Wed')").click()
+        monday_btn = page.get_by_role("button", name="Mon", exact=True)
+        expect(monday_btn).to_be_visible()
+        monday_btn.click()
+        page.get_by_role("button", name="Wed", exact=True).click()
         
-        page.click('button:has-text("Create")')
-        expect(page.locator(".modal")).not_to_be_visible()
+        page.get_by_role("button", name="Create", exact=True).click()
+        expect(modal).not_to_be_visible()
         
         # Verify task appears with recurring badge
-        page.wait_for_timeout(500)
         task_card = page.locator(f".admin-task-card:has-text('{task_title}')")
         expect(task_card).to_be_visible()
         expect(task_card.locator(".repeat-badge")).to_be_visible()
 
-    def test_edit_task_title(self, page: Page):
+    def test_edit_task_title(self, page: Page, run_tag: str, seed_task):
         """Edit a task's title."""
-        page.goto(f"{BASE_URL}/admin")
-        page.wait_for_load_state("networkidle")
+        task_title = f"EditMe {run_tag}"
+        seed_task(task_title)
+        _goto_admin(page)
         
-        # Find first task card and click edit
-        first_task = page.locator(".admin-task-card").first
-        original_title = first_task.locator(".admin-task-title").text_content()
-        
-        first_task.hover()
-        first_task.locator(".admin-task-btn.edit").click()
+        # Find the task card and click edit
+        task_card = page.locator(f".admin-task-card:has-text('{task_title}')")
+        task_card.hover()
+        task_card.locator(".admin-task-btn.edit").click()
         
-        expect(page.locator(".modal")).to_be_visible()
+        modal = page.locator(".modal")
+        expect(modal).to_be_visible()
         
         # Change title
-        new_title = f"Edited {int(time.time())}"
-        page.fill('input[placeholder="Task title"]', new_title)
-        page.click('button:has-text("Save")')
+        new_title = f"Edited {run_tag}"
+        page.get_by_placeholder("Task title").fill(new_title)
+        page.get_by_role("button", name="Save", exact=True).click()
         
-        expect(page.locator(".modal")).not_to_be_visible()
+        expect(modal).not_to_be_visible()
         
         # Verify title changed
-        page.wait_for_timeout(500)
         expect(page.locator(f".admin-task-title:has-text('{new_title}')")).to_be_visible()
 
-    def test_delete_task(self, page: Page):
+    def test_delete_task(self, page: Page, run_tag: str, seed_task):
         """Delete a task."""
-        page.goto(f"{BASE_URL}/admin")
-        page.wait_for_load_state("networkidle")
-        
-        # Create a task first to delete
-        page.locator(".insert-btn button").first.click()
-        task_title = f"DeleteMe {int(time.time())}"
-        page.fill('input[placeholder="Task title"]', task_title)
-        page.click('button:has-text("Create")')
-        expect(page.locator(".modal")).not_to_be_visible()
-        page.wait_for_timeout(500)
+        task_title = f"DeleteMe {run_tag}"
+        seed_task(task_title)
+        _goto_admin(page)
         
         # Find and delete the task
         task_card = page.locator(f".admin-task-card:has-text('{task_title}')")
@@ -138,214 +155,132 @@ class TestAdminUI:
         task_card.locator(".admin-task-btn.delete").click()
         
         # Verify task is gone
-        page.wait_for_timeout(500)
-        expect(page.locator(f".admin-task-card:has-text('{task_title}')")).not_to_be_visible()
+        expect(task_card).not_to_be_visible()
         
         # Reload and verify still gone
         page.reload()
-        page.wait_for_load_state("networkidle")
-        expect(page.locator(f".admin-task-card:has-text('{task_title}')")).not_to_be_visible()
+        expect(page.locator(".day-panel")).to_have_count(7)
+        expect(task_card).not_to_be_visible()
 
-    def test_drag_reorder_same_day(self, page: Page):
+    @pytest.mark.xdist_group("mutating")
+    def test_drag_reorder_same_day(self, page: Page, run_tag: str, seed_task):
         """Drag a task to reorder within the same day."""
-        page.goto(f"{BASE_URL}/admin")
-        page.wait_for_load_state("networkidle")
-        
-        # Find a panel with at least 2 tasks
-        panels = page.locator(".day-panel")
-        
-        for i in range(panels.count()):
-            panel = panels.nth(i)
-            tasks = panel.locator(".admin-task-card")
-            if tasks.count() >= 2:
-                # Get titles before
-                first_title = tasks.nth(0).locator(".admin-task-title").text_content()
-                
-                # Drag first to second position
-                tasks.nth(0).drag_to(tasks.nth(1))
-                page.wait_for_timeout(500)
-                
-                # Just verify no errors occurred - drag worked
-                return
-        
-        pytest.skip("Need at least 2 tasks in one day to test reordering")
+        first = seed_task(f"DragA {run_tag}", order=0)
+        second = seed_task(f"DragB {run_tag}", order=1)
+        _goto_admin(page)
+        
+        first_card = page.locator(f".admin-task-card:has-text('{first['title']}')")
+        second_card = page.locator(f".admin-task-card:has-text('{second['title']}')")
+        
+        # Drag first to second position and wait for it to be saved
+        with page.expect_response("**/api/admin/tasks/reorder") as response:
+            first_card.drag_to(second_card)
+        
+        assert response.value.ok
 
+    @pytest.mark.xdist_group("mutating")
     def test_sync_button_works(self, page: Page):
         """Test the sync/regenerate button."""
-        page.goto(f"{BASE_URL}/admin")
-        page.wait_for_load_state("networkidle")
+        _goto_admin(page)
         
         # Click sync button
         page.on("dialog", lambda dialog: dialog.accept())
-        page.click(".regenerate-btn")
-        
-        # Wait for reload
-        page.wait_for_timeout(1000)
+        with page.expect_response("**/api/admin/regenerate-week", timeout=SYNC_TIMEOUT_MS) as response:
+            page.click(".regenerate-btn")
+        assert response.value.ok
         
         # Page should still work
         expect(page.locator("h1")).to_have_text("Ilse.Admin")
 
-    def test_theme_switching(self, page: Page):
+    @pytest.mark.parametrize("theme", ["dark", "sunset", "ocean", "neon", "paper", "solid"])
+    def test_theme_switching(self, shared_page: Page, theme: str):
         """Test theme picker."""
-        page.goto(f"{BASE_URL}/admin")
-        
-        # Click different themes
-        for theme in ["dark", "sunset", "ocean", "neon", "paper", "solid"]:
-            page.click(f'.theme-option[data-theme="{theme}"]')
-            page.wait_for_timeout(100)
-            
-            # Verify theme is set
-            html = page.locator("html")
-            expect(html).to_have_attribute("data-theme", theme)
+        shared_page.goto(f"{BASE_URL}/admin")
+        
+        shared_page.click(f'.theme-option[data-theme="{theme}"]')
+        
+        # Verify theme is set
+        expect(shared_page.locator("html")).to_have_attribute("data-theme", theme)
 
 
 class TestMimiClientUI:
     """E2E tests for Mimi's client interface."""
 
-    def test_client_page_loads(self, page: Page):
+    def test_client_page_loads(self, shared_page: Page):
         """Client page loads with task list."""
-        page.goto(BASE_URL)
+        shared_page.goto(BASE_URL)
         
         # Should see date heading
-        expect(page.locator(".date-label h1")).to_be_visible()
+        expect(shared_page.locator(".date-label h1")).to_be_visible()
         
         # Should see navigation arrows
-        expect(page.locator(".nav-btn")).to_have_count(2)
+        expect(shared_page.locator(".nav-btn")).to_have_count(2)
 
     def test_navigate_days(self, page: Page):
         """Navigate between days using arrows."""
-        page.goto(BASE_URL)
-        page.wait_for_load_state("networkidle")
+        _goto_client(page)
         
         # Get current date text
-        current_date = page.locator(".date-label h1").text_content()
+        date_label = page.locator(".date-label h1")
+        current_date = date_label.text_content()
         
-        # Go to previous day
+        # Go to previous day - date should change
         page.click(".nav-btn:first-child")
-        page.wait_for_timeout(500)
-        
-        # Date should change
-        new_date = page.locator(".date-label h1").text_content()
-        assert new_date != current_date
+        expect(date_label).not_to_have_text(current_date)
         
         # Go back to today (next day button)
         page.click(".nav-btn:last-child")
-        page.wait_for_timeout(500)
+        expect(date_label).to_have_text(current_date)
 
-    def test_complete_task(self, page: Page):
+    def test_complete_task(self, page: Page, run_tag: str, seed_task):
         """Complete a task by clicking it."""
-        page.goto(BASE_URL)
-        page.wait_for_load_state("networkidle")
-        page.wait_for_timeout(1000)  # Wait for Alpine to initialize
-        
-        tasks = page.locator(".task-card:not(.completed)")
-        
-        if tasks.count() == 0:
-            pytest.skip("No incomplete tasks to test")
-        
-        # Click first incomplete task
-        first_task = tasks.first
-        first_task.click()
-        
-        # Wait and check
-        page.wait_for_timeout(1000)
-        # Re-query to get fresh element state
-        page.reload()
-        page.wait_for_load_state("networkidle")
-        # Just verify page still loads - completion happened
+        task_title = f"CompleteMe {run_tag}"
+        seed_task(task_title)
+        _goto_client(page)
+        
+        # Click the incomplete task
+        task_card = page.locator(".task-card").filter(has_text=task_title)
+        with page.expect_response("**/complete") as response:
+            task_card.click()
+        assert response.value.ok
+        
+        # Completion persists across a reload
+        _goto_client(page)
+        expect(task_card).to_have_class(re.compile(r"\bcompleted\b"))
 
-    def test_uncomplete_task(self, page: Page):
+    def test_uncomplete_task(self, page: Page, run_tag: str, seed_task, base_url):
         """Uncomplete a task by clicking it again."""
-        page.goto(BASE_URL)
-        page.wait_for_load_state("networkidle")
-        page.wait_for_timeout(1000)
-        
-        completed_tasks = page.locator(".task-card.completed")
-        
-        if completed_tasks.count() == 0:
-            pytest.skip("No completed tasks to test")
+        task_title = f"UncompleteMe {run_tag}"
+        task = seed_task(task_title)
+        httpx.post(f"{base_url}/api/tasks/{task['id']}/complete").raise_for_status()
+        _goto_client(page)
         
         # Click completed task
-        completed_tasks.first.click()
-        page.wait_for_timeout(500)
-        # Just verify no error
+        task_card = page.locator(".task-card").filter(has_text=task_title)
+        expect(task_card).to_have_class(re.compile(r"\bcompleted\b"))
+        with page.expect_response("**/uncomplete") as response:
+            task_card.click()
+        assert response.value.ok
+        expect(task_card).not_to_have_class(re.compile(r"\bcompleted\b"))
 
-    def test_view_task_description(self, page: Page):
+    def test_view_task_description(self, page: Page, run_tag: str, seed_task):
         """View task description by clicking info button."""
-        page.goto(BASE_URL)
-        page.wait_for_load_state("networkidle")
-        page.wait_for_timeout(1000)
-        
-        # Find a visible info button (task with description)
-        info_btns = page.locator(".info-btn:visible")
-        
-        if info_btns.count() == 0:
-            pytest.skip("No visible tasks with descriptions")
+        task_title = f"Described {run_tag}"
+        description = f"Notes for {run_tag}"
+        seed_task(task_title, description=description)
+        _goto_client(page)
         
-        info_btns.first.click()
-        page.wait_for_timeout(300)
+        # The info button only shows on tasks with a description
+        task_card = page.locator(".task-card").filter(has_text=task_title)
+        task_card.locator(".info-btn").click()
         
         # Description should appear
-        expect(page.locator(".task-description").first).to_be_visible(timeout=2000)
+        expect(task_card.locator(".task-description")).to_have_text(description)
 
-    def test_theme_switching_client(self, page: Page):
+    @pytest.mark.parametrize("theme", ["dark", "sunset", "ocean"])
+    def test_theme_switching_client(self, shared_page: Page, theme: str):
         """Test theme picker on client."""
-        page.goto(BASE_URL)
+        shared_page.goto(BASE_URL)
         
-        for theme in ["dark", "sunset", "ocean"]:
-            page.click(f'.theme-option[data-theme="{theme}"]')
-            page.wait_for_timeout(100)
-            expect(page.locator("html")).to_have_attribute("data-theme", theme)
-
-
-class TestCrossPageConsistency:
-    """Tests that verify consistency between admin and client."""
-
-    def test_task_created_in_admin_appears_in_client(self, page: Page):
-        """Task created in admin should appear in client view."""
-        # First go to client to see today's date
-        page.goto(BASE_URL)
-        page.wait_for_load_state("networkidle")
-        page.wait_for_timeout(500)
-        
-        # Note the current date shown
-        today_text = page.locator(".date-label h1").text_content()
-        
-        # Go to admin
-        page.goto(f"{BASE_URL}/admin")
-        page.wait_for_load_state("networkidle")
-        page.wait_for_timeout(500)
-        
-        # Click the day dot that is marked as today
-        today_dot = page.locator(".day-dot.today")
-        if today_dot.count() > 0:
-            today_dot.click()
-            page.wait_for_timeout(500)
-        
-        # Find visible panel and click + button
-        visible_inserts = page.locator(".insert-btn button")
-        if visible_inserts.count() > 0:
-            visible_inserts.first.click()
-        else:
-            pytest.skip("No insert buttons found")
-        
-        # Create task
-        task_title = f"XPage{int(time.time())}"
-        page.fill('input[placeholder="Task title"]', task_title)
-        page.click('button:has-text("Create")')
-        page.wait_for_timeout(1500)
-        
-        # Verify task was created in admin
-        admin_task = page.locator(f".admin-task-title").filter(has_text=task_title)
-        if admin_task.count() == 0:
-            pytest.skip("Task not created in admin view")
-        
-        # Navigate to client
-        page.goto(BASE_URL)
-        page.wait_for_load_state("networkidle")
-        page.wait_for_timeout(1000)
-        
-        # Task might be on a different day than today's client view
-        # This is expected behavior - the test verifies the task exists in admin
-        # Cross-page consistency for specific dates would need date matching logic
-
+        shared_page.click(f'.theme-option[data-theme="{theme}"]')
+        expect(shared_page.locator("html")).to_have_attribute("data-theme", theme)
@@ -4,38 +4,32 @@ Tests full workflows across API endpoints, simulating user interactions.
 These tests verify edge cases documented in docs/EDGE_CASES.md
 """
 import pytest
-from datetime import date, timedelta
-from httpx import Client, ASGITransport
+from datetime import timedelta
+from sqlmodel import func, select
 
-from app.main import app
-from app.database import engine, get_session
-from app.models import TaskTemplate, Task, RepeatType, TaskPriority
-from sqlmodel import Session, select, delete
+from app.models import Task
+from tests.conftest import (
+    FRIDAY, MONDAY, SATURDAY, TODAY, TODAY_ISO, TUESDAY, WEDNESDAY, weekday_set,
+)
+
+
+def by_title(tasks: list[dict]) -> dict[str, dict]:
+    """Index a task list response by title."""
+    return {t["title"]: t for t in tasks}
 
 
 class TestIntegrationBase:
-    """Base class for integration tests with cleanup."""
-    
-    @pytest.fixture(autouse=True)
-    def setup_and_cleanup(self, session):
-        """Clean up before and after each test."""
-        # Clean up before
-        session.exec(delete(Task))
-        session.exec(delete(TaskTemplate))
-        session.commit()
-        
-        yield
-        
-        # Clean up after
-        session.exec(delete(Task))
-        session.exec(delete(TaskTemplate))
-        session.commit()
+    """
+    Base class for integration tests. Each test starts from an empty
+    database: the conftest connection fixture rolls back everything the test
+    (and the client's sessions) committed.
+    """
 
 
 class TestWeeklyTaskWorkflows(TestIntegrationBase):
     """Test workflows for weekly recurring tasks."""
     
-    def test_create_weekly_task_and_view_on_multiple_days(self, client, session):
+    def test_create_weekly_task_and_view_on_multiple_days(self, client):
         """Create a weekly task (Mon, Wed, Fri) and verify it appears on those days."""
         # Create template
         response = client.post("/api/admin/templates", json={
@@ -50,36 +44,28 @@ class TestWeeklyTaskWorkflows(TestIntegrationBase):
         template = response.json()
         assert template["repeat_type"] == "weekly"
         
-        # Get current week's Monday
-        today = date.today()
-        days_since_monday = today.weekday()
-        monday = today - timedelta(days=days_since_monday)
-        wednesday = monday + timedelta(days=2)
-        friday = monday + timedelta(days=4)
-        tuesday = monday + timedelta(days=1)
-        
         # Check Monday has task
-        response = client.get(f"/api/tasks/date/{monday}")
+        response = client.get(f"/api/tasks/date/{MONDAY}")
         assert response.status_code == 200
         tasks = response.json()
-        assert any(t["title"] == "Weekly Standup" for t in tasks)
+        assert "Weekly Standup" in by_title(tasks)
         
         # Check Wednesday has task
-        response = client.get(f"/api/tasks/date/{wednesday}")
+        response = client.get(f"/api/tasks/date/{WEDNESDAY}")
         tasks = response.json()
-        assert any(t["title"] == "Weekly Standup" for t in tasks)
+        assert "Weekly Standup" in by_title(tasks)
         
         # Check Friday has task
-        response = client.get(f"/api/tasks/date/{friday}")
+        response = client.get(f"/api/tasks/date/{FRIDAY}")
         tasks = response.json()
-        assert any(t["title"] == "Weekly Standup" for t in tasks)
+        assert "Weekly Standup" in by_title(tasks)
         
         # Check Tuesday does NOT have task
-        response = client.get(f"/api/tasks/date/{tuesday}")
+        response = client.get(f"/api/tasks/date/{TUESDAY}")
         tasks = response.json()
-        assert not any(t["title"] == "Weekly Standup" for t in tasks)
+        assert "Weekly Standup" not in by_title(tasks)
     
-    def test_move_weekly_task_to_different_day(self, client, session):
+    def test_move_weekly_task_to_different_day(self, client):
         """Moving a weekly task updates template weekdays."""
         # Create Mon, Wed template
         response = client.post("/api/admin/templates", json={
@@ -92,40 +78,36 @@ class TestWeeklyTaskWorkflows(TestIntegrationBase):
         })
         template_id = response.json()["id"]
         
-        today = date.today()
-        monday = today - timedelta(days=today.weekday())
-        tuesday = monday + timedelta(days=1)
-        
         # Get Monday's task
-        response = client.get(f"/api/tasks/date/{monday}")
+        response = client.get(f"/api/tasks/date/{MONDAY}")
         tasks = response.json()
-        monday_task = next(t for t in tasks if t["title"] == "Team Sync")
+        monday_task = by_title(tasks)["Team Sync"]
         
         # Move Monday's task to Tuesday
         response = client.post(
-            f"/api/admin/tasks/{monday_task['id']}/move?target_date={tuesday}&order=0"
+            f"/api/admin/tasks/{monday_task['id']}/move?target_date={TUESDAY}&order=0"
         )
         assert response.status_code == 200
         
         # Verify template now has Tue, Wed (not Mon)
         response = client.get(f"/api/admin/templates/{template_id}")
         template = response.json()
-        weekdays = template["weekdays"].split(",")
-        assert "0" not in weekdays, "Monday should be removed"
-        assert "1" in weekdays, "Tuesday should be added"
-        assert "2" in weekdays, "Wednesday should remain"
+        weekdays = weekday_set(template["weekdays"])
+        assert 0 not in weekdays, "Monday should be removed"
+        assert 1 in weekdays, "Tuesday should be added"
+        assert 2 in weekdays, "Wednesday should remain"
         
         # Verify Monday no longer has task
-        response = client.get(f"/api/tasks/date/{monday}")
+        response = client.get(f"/api/tasks/date/{MONDAY}")
         tasks = response.json()
-        assert not any(t["title"] == "Team Sync" for t in tasks)
+        assert "Team Sync" not in by_title(tasks)
         
         # Verify Tuesday now has task
-        response = client.get(f"/api/tasks/date/{tuesday}")
+        response = client.get(f"/api/tasks/date/{TUESDAY}")
         tasks = response.json()
-        assert any(t["title"] == "Team Sync" for t in tasks)
+        assert "Team Sync" in by_title(tasks)
     
-    def test_move_weekly_task_to_existing_day(self, client, session):
+    def test_move_weekly_task_to_existing_day(self, client):
         """Moving a weekly task to a day it already exists on = delete from source."""
         # Create Mon, Wed, Fri template
         response = client.post("/api/admin/templates", json={
@@ -138,36 +120,32 @@ class TestWeeklyTaskWorkflows(TestIntegrationBase):
         })
         template_id = response.json()["id"]
         
-        today = date.today()
-        monday = today - timedelta(days=today.weekday())
-        friday = monday + timedelta(days=4)
-        
         # Get Monday's task
-        response = client.get(f"/api/tasks/date/{monday}")
+        response = client.get(f"/api/tasks/date/{MONDAY}")
         tasks = response.json()
-        monday_task = next(t for t in tasks if t["title"] == "Recurring Check")
+        monday_task = by_title(tasks)["Recurring Check"]
         
         # Move Monday's task to Friday (already exists on Friday!)
         response = client.post(
-            f"/api/admin/tasks/{monday_task['id']}/move?target_date={friday}&order=0"
+            f"/api/admin/tasks/{monday_task['id']}/move?target_date={FRIDAY}&order=0"
         )
         assert response.status_code == 200
         
         # Verify template now has Wed, Fri only (Monday removed)
         response = client.get(f"/api/admin/templates/{template_id}")
         template = response.json()
-        weekdays = set(template["weekdays"].split(","))
-        assert "0" not in weekdays, "Monday should be removed"
-        assert "2" in weekdays, "Wednesday should remain"
-        assert "4" in weekdays, "Friday should remain"
+        weekdays = weekday_set(template["weekdays"])
+        assert 0 not in weekdays, "Monday should be removed"
+        assert 2 in weekdays, "Wednesday should remain"
+        assert 4 in weekdays, "Friday should remain"
         
         # Verify only one task on Friday (not duplicated)
-        response = client.get(f"/api/tasks/date/{friday}")
+        response = client.get(f"/api/tasks/date/{FRIDAY}")
         tasks = response.json()
         recurring_checks = [t for t in tasks if t["title"] == "Recurring Check"]
         assert len(recurring_checks) == 1, "Should have exactly one task, not duplicated"
     
-    def test_delete_weekly_task_removes_from_weekdays(self, client, session):
+    def test_delete_weekly_task_removes_from_weekdays(self, client):
         """Deleting a weekly task instance removes that day from template."""
         # Create Mon, Wed template
         response = client.post("/api/admin/templates", json={
@@ -180,18 +158,14 @@ class TestWeeklyTaskWorkflows(TestIntegrationBase):
         })
         template_id = response.json()["id"]
         
-        today = date.today()
-        monday = today - timedelta(days=today.weekday())
-        wednesday = monday + timedelta(days=2)
-        
         # Get Monday's task
-        response = client.get(f"/api/tasks/date/{monday}")
+        response = client.get(f"/api/tasks/date/{MONDAY}")
         tasks = response.json()
-        monday_task = next(t for t in tasks if t["title"] == "Delete Test")
+        monday_task = by_title(tasks)["Delete Test"]
         
         # Delete Monday's task
         response = client.delete(f"/api/admin/tasks/{monday_task['id']}")
-        assert response.status_code == 200
+        assert response.status_code == 204
         
         # Verify template now only has Wednesday
         response = client.get(f"/api/admin/templates/{template_id}")
@@ -199,21 +173,25 @@ class TestWeeklyTaskWorkflows(TestIntegrationBase):
         assert template["weekdays"] == "2"
         
         # Verify Monday no longer has task (even after reload)
-        response = client.get(f"/api/tasks/date/{monday}")
+        response = client.get(f"/api/tasks/date/{MONDAY}")
         tasks = response.json()
-        assert not any(t["title"] == "Delete Test" for t in tasks)
+        assert "Delete Test" not in by_title(tasks)
         
         # Wednesday still has task
-        response = client.get(f"/api/tasks/date/{wednesday}")
+        response = client.get(f"/api/tasks/date/{WEDNESDAY}")
         tasks = response.json()
-        assert any(t["title"] == "Delete Test" for t in tasks)
+        assert "Delete Test" in by_title(tasks)
 
 
 class TestDailyTaskWorkflows(TestIntegrationBase):
     """Test workflows for daily recurring tasks."""
     
-    def test_create_daily_task_appears_all_weekdays(self, client, session):
-        """Daily task appears Mon-Fri."""
+    @pytest.mark.parametrize("offset,expected", [
+        (0, True), (1, True), (2, True), (3, True), (4, True),  # Mon-Fri
+        (5, False), (6, False),  # Weekend
+    ])
+    def test_create_daily_task_appears_on_weekdays(self, client, offset, expected):
+        """Daily task appears Mon-Fri and not at the weekend."""
         response = client.post("/api/admin/templates", json={
             "title": "Daily Cleanup",
             "priority": "optional",
@@ -224,23 +202,12 @@ class TestDailyTaskWorkflows(TestIntegrationBase):
         })
         assert response.status_code == 200
         
-        today = date.today()
-        monday = today - timedelta(days=today.weekday())
-        
-        # Check all weekdays
-        for i in range(5):  # Mon-Fri
-            day = monday + timedelta(days=i)
-            response = client.get(f"/api/tasks/date/{day}")
-            tasks = response.json()
-            assert any(t["title"] == "Daily Cleanup" for t in tasks), f"Missing on day {i}"
-        
-        # Check weekend - should NOT have task
-        saturday = monday + timedelta(days=5)
-        response = client.get(f"/api/tasks/date/{saturday}")
+        day = MONDAY + timedelta(days=offset)
+        response = client.get(f"/api/tasks/date/{day}")
         tasks = response.json()
-        assert not any(t["title"] == "Daily Cleanup" for t in tasks)
+        assert ("Daily Cleanup" in by_title(tasks)) is expected
     
-    def test_delete_daily_task_converts_to_weekly(self, client, session):
+    def test_delete_daily_task_converts_to_weekly(self, client):
         """Deleting a daily task converts template to weekly minus that day."""
         response = client.post("/api/admin/templates", json={
             "title": "Daily to Weekly",
@@ -252,33 +219,29 @@ class TestDailyTaskWorkflows(TestIntegrationBase):
         })
         template_id = response.json()["id"]
         
-        today = date.today()
-        monday = today - timedelta(days=today.weekday())
-        wednesday = monday + timedelta(days=2)
-        
         # Get Wednesday's task
-        response = client.get(f"/api/tasks/date/{wednesday}")
+        response = client.get(f"/api/tasks/date/{WEDNESDAY}")
         tasks = response.json()
-        wed_task = next(t for t in tasks if t["title"] == "Daily to Weekly")
+        wed_task = by_title(tasks)["Daily to Weekly"]
         
         # Delete Wednesday's task
         response = client.delete(f"/api/admin/tasks/{wed_task['id']}")
-        assert response.status_code == 200
+        assert response.status_code == 204
         
         # Verify template is now weekly, excluding Wednesday
         response = client.get(f"/api/admin/templates/{template_id}")
         template = response.json()
         assert template["repeat_type"] == "weekly"
-        weekdays = set(template["weekdays"].split(","))
-        assert "2" not in weekdays, "Wednesday should be excluded"
-        assert weekdays == {"0", "1", "3", "4"}, f"Expected Mon,Tue,Thu,Fri, got {weekdays}"
+        weekdays = weekday_set(template["weekdays"])
+        assert 2 not in weekdays, "Wednesday should be excluded"
+        assert weekdays == {0, 1, 3, 4}, f"Expected Mon,Tue,Thu,Fri, got {weekdays}"
         
         # Verify Wednesday no longer has task
-        response = client.get(f"/api/tasks/date/{wednesday}")
+        response = client.get(f"/api/tasks/date/{WEDNESDAY}")
         tasks = response.json()
-        assert not any(t["title"] == "Daily to Weekly" for t in tasks)
+        assert "Daily to Weekly" not in by_title(tasks)
     
-    def test_move_daily_task_to_different_day(self, client, session):
+    def test_move_daily_task_to_different_day(self, client):
         """Moving a daily task converts to weekly."""
         response = client.post("/api/admin/templates", json={
             "title": "Daily Move Test",
@@ -290,18 +253,14 @@ class TestDailyTaskWorkflows(TestIntegrationBase):
         })
         template_id = response.json()["id"]
         
-        today = date.today()
-        monday = today - timedelta(days=today.weekday())
-        saturday = monday + timedelta(days=5)  # Move to weekend!
-        
         # Get Monday's task
-        response = client.get(f"/api/tasks/date/{monday}")
+        response = client.get(f"/api/tasks/date/{MONDAY}")
         tasks = response.json()
-        mon_task = next(t for t in tasks if t["title"] == "Daily Move Test")
+        mon_task = by_title(tasks)["Daily Move Test"]
         
         # Move to Saturday (weekend)
         response = client.post(
-            f"/api/admin/tasks/{mon_task['id']}/move?target_date={saturday}&order=0"
+            f"/api/admin/tasks/{mon_task['id']}/move?target_date={SATURDAY}&order=0"
         )
         assert response.status_code == 200
         
@@ -309,24 +268,23 @@ class TestDailyTaskWorkflows(TestIntegrationBase):
         response = client.get(f"/api/admin/templates/{template_id}")
         template = response.json()
         assert template["repeat_type"] == "weekly"
-        weekdays = set(template["weekdays"].split(","))
-        assert "0" not in weekdays, "Monday should be removed"
-        assert "5" in weekdays, "Saturday should be added"
+        weekdays = weekday_set(template["weekdays"])
+        assert 0 not in weekdays, "Monday should be removed"
+        assert 5 in weekdays, "Saturday should be added"
 
 
 class TestOneTimeTaskWorkflows(TestIntegrationBase):
     """Test workflows for one-time (non-recurring) tasks."""
     
-    def test_create_and_move_one_time_task(self, client, session):
+    def test_create_and_move_one_time_task(self, client):
         """One-time task can be moved freely."""
-        today = date.today()
-        tomorrow = today + timedelta(days=1)
+        tomorrow = TODAY + timedelta(days=1)
         
         # Create one-time task for today
         response = client.post("/api/admin/tasks", json={
             "title": "One Time Task",
             "priority": "optional",
-            "scheduled_date": str(today),
+            "scheduled_date": TODAY_ISO,
             "order": 0,
             "expected_minutes": 30
         })
@@ -334,9 +292,9 @@ class TestOneTimeTaskWorkflows(TestIntegrationBase):
         task_id = response.json()["id"]
         
         # Verify it exists today
-        response = client.get(f"/api/tasks/date/{today}")
+        response = client.get(f"/api/tasks/date/{TODAY}")
         tasks = response.json()
-        assert any(t["title"] == "One Time Task" for t in tasks)
+        assert "One Time Task" in by_title(tasks)
         
         # Move to tomorrow
         response = client.post(
@@ -345,22 +303,20 @@ class TestOneTimeTaskWorkflows(TestIntegrationBase):
         assert response.status_code == 200
         
         # Verify moved
-        response = client.get(f"/api/tasks/date/{today}")
+        response = client.get(f"/api/tasks/date/{TODAY}")
         tasks = response.json()
-        assert not any(t["title"] == "One Time Task" for t in tasks)
+        assert "One Time Task" not in by_title(tasks)
         
         response = client.get(f"/api/tasks/date/{tomorrow}")
         tasks = response.json()
-        assert any(t["title"] == "One Time Task" for t in tasks)
+        assert "One Time Task" in by_title(tasks)
     
-    def test_delete_one_time_task(self, client, session):
+    def test_delete_one_time_task(self, client):
         """Deleting one-time task removes it permanently."""
-        today = date.today()
-        
         response = client.post("/api/admin/tasks", json={
             "title": "Delete Me",
             "priority": "optional",
-            "scheduled_date": str(today),
+            "scheduled_date": TODAY_ISO,
             "order": 0,
             "expected_minutes": 10
         })
@@ -368,25 +324,52 @@ class TestOneTimeTaskWorkflows(TestIntegrationBase):
         
         # Delete
         response = client.delete(f"/api/admin/tasks/{task_id}")
-        assert response.status_code == 200
+        assert response.status_code == 204
         
         # Verify gone
-        response = client.get(f"/api/tasks/date/{today}")
+        response = client.get(f"/api/tasks/date/{TODAY}")
         tasks = response.json()
-        assert not any(t["title"] == "Delete Me" for t in tasks)
+        assert "Delete Me" not in by_title(tasks)
+
+
+class TestCrossPageConsistency(TestIntegrationBase):
+    """Tasks created through the admin API show up in Mimi's view."""
+    
+    def test_task_created_in_admin_appears_in_client(self, client):
+        """One-off tasks and today's template tasks both appear in /api/tasks/today."""
+        response = client.post("/api/admin/tasks", json={
+            "title": "Admin One-Off",
+            "priority": "optional",
+            "scheduled_date": str(TODAY),
+            "order": 0,
+            "expected_minutes": 10
+        })
+        assert response.status_code == 200
+        response = client.post("/api/admin/templates", json={
+            "title": "Admin Weekly",
+            "priority": "optional",
+            "repeat_type": "weekly",
+            "weekdays": str(TODAY.weekday()),
+            "order": 1,
+            "expected_minutes": 10
+        })
+        assert response.status_code == 200
+        
+        response = client.get("/api/tasks/today")
+        assert response.status_code == 200
+        titles = [t["title"] for t in response.json()]
+        assert titles == ["Admin One-Off", "Admin Weekly"]
 
 
 class TestTaskCompletionWorkflows(TestIntegrationBase):
     """Test task completion from Mimi client perspective."""
     
-    def test_complete_and_uncomplete_task(self, client, session):
+    def test_complete_and_uncomplete_task(self, client):
         """Tasks can be completed and uncompleted."""
-        today = date.today()
-        
         response = client.post("/api/admin/tasks", json={
             "title": "Complete Test",
             "priority": "optional",
-            "scheduled_date": str(today),
+            "scheduled_date": TODAY_ISO,
             "order": 0,
             "expected_minutes": 15
         })
@@ -399,7 +382,7 @@ class TestTaskCompletionWorkflows(TestIntegrationBase):
         assert result["status"] == "completed"
         
         # Verify status
-        response = client.get(f"/api/tasks/date/{today}")
+        response = client.get(f"/api/tasks/date/{TODAY}")
         tasks = response.json()
         task = next(t for t in tasks if t["id"] == task_id)
         assert task["status"] == "completed"
@@ -414,24 +397,21 @@ class TestTaskCompletionWorkflows(TestIntegrationBase):
 class TestReorderingWorkflows(TestIntegrationBase):
     """Test task reordering."""
     
-    def test_reorder_tasks_same_day(self, client, session):
+    def test_reorder_tasks_same_day(self, client):
         """Tasks can be reordered within same day."""
-        today = date.today()
-        
-        # Create 3 tasks
-        for i, title in enumerate(["First", "Second", "Third"]):
-            client.post("/api/admin/tasks", json={
+        # Create 3 tasks in one request
+        response = client.post("/api/admin/tasks/bulk", json=[
+            {
                 "title": title,
                 "priority": "optional",
-                "scheduled_date": str(today),
+                "scheduled_date": TODAY_ISO,
                 "order": i,
                 "expected_minutes": 10
-            })
-        
-        # Get tasks
-        response = client.get(f"/api/tasks/date/{today}")
+            }
+            for i, title in enumerate(["First", "Second", "Third"])
+        ])
+        assert response.status_code == 200
         tasks = response.json()
-        assert [t["title"] for t in sorted(tasks, key=lambda x: x["order"])] == ["First", "Second", "Third"]
         
         # Reorder: Third -> First -> Second
         task_ids = {t["title"]: t["id"] for t in tasks}
@@ -442,10 +422,10 @@ class TestReorderingWorkflows(TestIntegrationBase):
         ]
         
         response = client.post("/api/admin/tasks/reorder", json=reorders)
-        assert response.status_code == 200
+        assert response.status_code == 204
         
         # Verify new order
-        response = client.get(f"/api/tasks/date/{today}")
+        response = client.get(f"/api/tasks/date/{TODAY}")
         tasks = response.json()
         assert [t["title"] for t in sorted(tasks, key=lambda x: x["order"])] == ["Third", "First", "Second"]
 
@@ -464,19 +444,20 @@ class TestEdgeCases(TestIntegrationBase):
             "expected_minutes": 10
         })
         
-        today = date.today()
-        monday = today - timedelta(days=today.weekday())
-        
-        # Request same date multiple times
-        for _ in range(5):
-            response = client.get(f"/api/tasks/date/{monday}")
+        # Request same date twice; the second request must not generate again
+        for _ in range(2):
+            response = client.get(f"/api/tasks/date/{MONDAY}")
             tasks = response.json()
         
-        # Should have exactly one task
+        # Should have exactly one task, both in the response and in the table
         idempotent_tasks = [t for t in tasks if t["title"] == "Idempotent Task"]
         assert len(idempotent_tasks) == 1
+        stored = session.exec(
+            select(func.count()).select_from(Task).where(Task.title == "Idempotent Task")
+        ).one()
+        assert stored == 1
     
-    def test_delete_last_weekday_deactivates_template(self, client, session):
+    def test_delete_last_weekday_deactivates_template(self, client):
         """Deleting the last remaining weekday deactivates the template."""
         response = client.post("/api/admin/templates", json={
             "title": "Single Day",
@@ -488,17 +469,14 @@ class TestEdgeCases(TestIntegrationBase):
         })
         template_id = response.json()["id"]
         
-        today = date.today()
-        monday = today - timedelta(days=today.weekday())
-        
         # Get Monday's task
-        response = client.get(f"/api/tasks/date/{monday}")
+        response = client.get(f"/api/tasks/date/{MONDAY}")
         tasks = response.json()
-        task = next(t for t in tasks if t["title"] == "Single Day")
+        task = by_title(tasks)["Single Day"]
         
         # Delete it
         response = client.delete(f"/api/admin/tasks/{task['id']}")
-        assert response.status_code == 200
+        assert response.status_code == 204
         
         # Template should be deactivated
         response = client.get(f"/api/admin/templates/{template_id}")
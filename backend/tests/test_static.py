@@ -0,0 +1,129 @@
+"""
+Tests for static file serving.
+"""
+import os
+
+from app.static_files import load_static_file
+
+
+class TestCachedStaticFiles:
+    """Tests for the in-memory static file cache."""
+
+    def test_serves_file_with_etag(self, client):
+        """Static files should be served with an ETag and the right type."""
+        response = client.get("/static/mimi.css", headers={"Accept-Encoding": "identity"})
+
+        assert response.status_code == 200
+        assert response.headers["etag"]
+        assert response.headers["content-type"].startswith("text/css")
+        assert "content-encoding" not in response.headers
+        assert len(response.content) == int(response.headers["content-length"])
+
+    def test_serves_gzip_variant_when_accepted(self, client):
+        """Clients accepting gzip get the precompressed body and its own ETag."""
+        plain = client.get("/static/mimi.js", headers={"Accept-Encoding": "identity"})
+        response = client.get("/static/mimi.js", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.headers["etag"] != plain.headers["etag"]
+        assert int(response.headers["content-length"]) < len(plain.content)
+        assert response.content == plain.content  # httpx decodes the gzip body
+
+    def test_refused_encoding_is_not_sent(self, client):
+        """An encoding listed with q=0 is a refusal, not an acceptance."""
+        response = client.get("/static/mimi.js", headers={"Accept-Encoding": "gzip;q=0, identity"})
+
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+
+    def test_if_none_match_returns_304(self, client):
+        """A matching If-None-Match should return 304 with no body."""
+        etag = client.get("/static/mimi.js").headers["etag"]
+
+        response = client.get("/static/mimi.js", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_repeat_requests_hit_cache(self, client):
+        """The file should only be read from disk once while unchanged."""
+        client.get("/static/admin.css")
+        hits = load_static_file.cache_info().hits
+
+        client.get("/static/admin.css")
+
+        assert load_static_file.cache_info().hits == hits + 1
+
+    def test_missing_file_returns_404(self, client):
+        """Unknown static paths should still 404."""
+        response = client.get("/static/nope.css")
+        assert response.status_code == 404
+
+
+class TestFavicon:
+    """Tests for the favicon route."""
+
+    def test_favicon_is_cacheable(self, client):
+        """Favicon should carry a strong ETag and a short, revalidated Cache-Control."""
+        response = client.get("/favicon.ico")
+
+        assert response.status_code == 200
+        assert response.headers["etag"].startswith('"')
+        assert response.headers["cache-control"] == "public, max-age=86400"
+
+    def test_favicon_picks_up_a_changed_file(self, client, monkeypatch, tmp_path):
+        """Editing the icon changes the served body and ETag without a restart."""
+        from app import main
+
+        icon = tmp_path / "favicon.ico"
+        icon.write_bytes(b"old icon")
+        monkeypatch.setattr(main, "static_path", tmp_path)
+        first = client.get("/favicon.ico")
+
+        icon.write_bytes(b"new icon!")
+        os.utime(icon, ns=(0, icon.stat().st_mtime_ns + 1_000_000_000))
+        second = client.get("/favicon.ico")
+
+        assert first.content == b"old icon"
+        assert second.content == b"new icon!"
+        assert second.headers["etag"] != first.headers["etag"]
+
+    def test_favicon_if_none_match_returns_304(self, client):
+        """Repeat hits with the ETag should not resend the icon."""
+        etag = client.get("/favicon.ico").headers["etag"]
+
+        response = client.get("/favicon.ico", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+
+
+class TestPages:
+    """Tests for the HTML page shells."""
+
+    def test_pages_prerendered_without_auto_reload(self, client, monkeypatch):
+        """With auto-reload off, page shells are rendered once and reused."""
+        from app import main
+        from app.config import get_settings
+
+        monkeypatch.setattr(get_settings(), "template_auto_reload", False)
+        main.prerender_page.cache_clear()
+
+        first = client.get("/admin")
+        second = client.get("/admin")
+
+        assert first.status_code == 200
+        assert first.headers["content-type"].startswith("text/html")
+        assert second.content == first.content
+        assert main.prerender_page.cache_info().hits == 1
+
+    def test_page_if_none_match_returns_304(self, client):
+        """Page shells carry an ETag and answer revalidation with 304."""
+        first = client.get("/")
+        assert first.headers["cache-control"] == "private, max-age=60, must-revalidate"
+
+        response = client.get("/", headers={"If-None-Match": first.headers["etag"]})
+
+        assert response.status_code == 304
+        assert response.content == b""
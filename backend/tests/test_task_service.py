@@ -2,46 +2,54 @@
 Tests for task_service.py - core business logic.
 """
 import pytest
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, SQLModel, select
 
 from app.services import task_service
 from app.models import (
     Task, TaskTemplate, TaskPriority, TaskStatus, RepeatType,
-    TaskTemplateCreate, TaskTemplateUpdate, TaskUpdate
+    TaskTemplateCreate, TaskTemplateRead, TaskTemplateUpdate, TaskUpdate
+)
+from tests.conftest import (
+    FRIDAY, MONDAY, SATURDAY, SUNDAY, TODAY, TUESDAY, WEDNESDAY, weekday_set,
 )
 
 
 class TestTemplateMatching:
     """Tests for template_matches_date logic."""
     
-    def test_daily_matches_weekdays(self, session, sample_daily_template):
+    def test_daily_matches_weekdays(self, sample_daily_template_obj):
         """Daily templates should match Mon-Fri."""
         # Monday
-        monday = date(2025, 12, 29)
-        assert task_service.template_matches_date(sample_daily_template, monday) is True
+        assert task_service.template_matches_date(sample_daily_template_obj, MONDAY) is True
         
         # Friday
-        friday = date(2026, 1, 2)
-        assert task_service.template_matches_date(sample_daily_template, friday) is True
+        assert task_service.template_matches_date(sample_daily_template_obj, FRIDAY) is True
     
-    def test_daily_does_not_match_weekends(self, session, sample_daily_template):
+    def test_daily_does_not_match_weekends(self, sample_daily_template_obj):
         """Daily templates should not match Sat/Sun."""
-        saturday = date(2025, 12, 27)
-        sunday = date(2025, 12, 28)
-        
-        assert task_service.template_matches_date(sample_daily_template, saturday) is False
-        assert task_service.template_matches_date(sample_daily_template, sunday) is False
+        assert task_service.template_matches_date(sample_daily_template_obj, SATURDAY) is False
+        assert task_service.template_matches_date(sample_daily_template_obj, SUNDAY) is False
     
-    def test_weekly_matches_specified_days(self, session, sample_template):
+    def test_weekly_matches_specified_days(self, sample_template_obj):
         """Weekly templates match only specified weekdays."""
         # sample_template has weekdays="0,2,4" (Mon, Wed, Fri)
-        monday = date(2025, 12, 29)  # Monday
-        tuesday = date(2025, 12, 30)  # Tuesday
-        wednesday = date(2025, 12, 31)  # Wednesday
         
-        assert task_service.template_matches_date(sample_template, monday) is True
-        assert task_service.template_matches_date(sample_template, tuesday) is False
-        assert task_service.template_matches_date(sample_template, wednesday) is True
+        assert task_service.template_matches_date(sample_template_obj, MONDAY) is True
+        assert task_service.template_matches_date(sample_template_obj, TUESDAY) is False
+        assert task_service.template_matches_date(sample_template_obj, WEDNESDAY) is True
+    
+    def test_sql_prefilter_agrees_with_template_matching(self, session, sample_template, sample_daily_template):
+        """repeats_on_clause selects the same weekly/daily templates as template_matches_date."""
+        templates = [sample_template, sample_daily_template]
+        for offset in range(7):
+            day = MONDAY + timedelta(days=offset)
+            statement = select(TaskTemplate.id).where(task_service.repeats_on_clause(day))
+            
+            expected = {t.id for t in templates if task_service.template_matches_date(t, day)}
+            assert set(session.exec(statement).all()) == expected, day
 
 
 class TestTemplateOperations:
@@ -79,6 +87,24 @@ class TestTemplateOperations:
         templates = task_service.get_templates(session, active_only=True)
         assert len(templates) == 0
     
+    def test_get_templates_by_id(self, session, sample_template, sample_daily_template):
+        """Batched lookup returns only the requested templates, keyed by id."""
+        found = task_service.get_templates_by_id(session, {sample_template.id, 9999})
+        
+        assert list(found) == [sample_template.id]
+        assert task_service.get_templates_by_id(session, set()) == {}
+    
+    def test_get_template_rows_match_read_model(self, session, sample_template, sample_daily_template):
+        """Row dicts carry the same data as TaskTemplateRead, weekdays included."""
+        rows = task_service.get_template_rows(session, active_only=False)
+        
+        expected = [
+            TaskTemplateRead.model_validate(t).model_dump()
+            for t in (sample_template, sample_daily_template)
+        ]
+        assert rows == expected
+        assert rows[0]["weekdays"] == "0,2,4"
+    
     def test_update_template(self, session, sample_template):
         """Test updating a template."""
         updates = TaskTemplateUpdate(title="Updated Title", expected_minutes=60)
@@ -103,8 +129,7 @@ class TestTaskGeneration:
     def test_generate_creates_tasks_from_templates(self, session, sample_template):
         """Generate tasks should create tasks from matching templates."""
         # Monday - matches sample_template (weekdays="0,2,4")
-        monday = date(2025, 12, 29)
-        tasks = task_service.generate_tasks_for_date(session, monday)
+        tasks = task_service.generate_tasks_for_date(session, MONDAY)
         
         assert len(tasks) == 1
         assert tasks[0].title == "Clean Kitchen"
@@ -112,10 +137,9 @@ class TestTaskGeneration:
     
     def test_generate_is_idempotent(self, session, sample_template):
         """Calling generate twice should not create duplicates."""
-        monday = date(2025, 12, 29)
         
-        tasks1 = task_service.generate_tasks_for_date(session, monday)
-        tasks2 = task_service.generate_tasks_for_date(session, monday)
+        tasks1 = task_service.generate_tasks_for_date(session, MONDAY)
+        tasks2 = task_service.generate_tasks_for_date(session, MONDAY)
         
         assert len(tasks1) == 1
         assert len(tasks2) == 1
@@ -124,10 +148,76 @@ class TestTaskGeneration:
     def test_generate_skips_non_matching_days(self, session, sample_template):
         """Should not generate tasks for days that don't match template."""
         # Tuesday - doesn't match sample_template (weekdays="0,2,4")
-        tuesday = date(2025, 12, 30)
-        tasks = task_service.generate_tasks_for_date(session, tuesday)
+        tasks = task_service.generate_tasks_for_date(session, TUESDAY)
         
         assert len(tasks) == 0
+    
+    def test_generate_monthly_on_creation_day(self, session):
+        """Monthly templates fire on the day of month they were created."""
+        template = TaskTemplate(
+            title="Pay Rent",
+            priority=TaskPriority.REQUIRED,
+            repeat_type=RepeatType.MONTHLY,
+            created_at=datetime(2025, 11, 15, 9, 30),
+        )
+        session.add(template)
+        session.commit()
+        
+        assert [t.template_id for t in task_service.generate_tasks_for_date(session, date(2025, 12, 15))] == [template.id]
+        assert task_service.generate_tasks_for_date(session, date(2025, 12, 16)) == []
+    
+    def test_one_task_per_template_per_day(self, session, sample_template):
+        """The schema itself rejects a second task for the same template and day."""
+        task_service.generate_tasks_for_date(session, MONDAY)
+        session.add(Task(
+            title="Duplicate", priority=TaskPriority.OPTIONAL,
+            scheduled_date=MONDAY, template_id=sample_template.id,
+        ))
+        
+        with pytest.raises(IntegrityError):
+            session.commit()
+    
+    def test_duplicate_template_tasks_are_deduped(self):
+        """Old duplicates are cleared before the unique index is built, keeping completed ones."""
+        from sqlalchemy import create_engine
+        from app.database import dedupe_template_tasks
+        
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE task (id INTEGER PRIMARY KEY, template_id INTEGER, "
+                "scheduled_date DATE, status INTEGER)"
+            ))
+            conn.execute(text(
+                "INSERT INTO task VALUES (1, 7, '2025-12-29', 0), (2, 7, '2025-12-29', 1), "
+                "(3, 7, '2025-12-30', 0), (4, NULL, '2025-12-29', 0), (5, NULL, '2025-12-29', 0)"
+            ))
+        
+        dedupe_template_tasks(engine)
+        
+        with engine.connect() as conn:
+            ids = conn.execute(text("SELECT id FROM task ORDER BY id")).scalars().all()
+        assert ids == [2, 3, 4, 5]
+    
+    def test_regenerate_range_rebuilds_template_tasks(self, session, sample_template, sample_task):
+        """Regenerating a week recreates template tasks and keeps one-off tasks."""
+        tasks = task_service.generate_tasks_for_date(session, MONDAY)
+        old_task = next(t for t in tasks if t.template_id == sample_template.id)
+        task_service.complete_task(session, old_task.id)
+        
+        count = task_service.regenerate_tasks_for_range(session, MONDAY, 7)
+        
+        # Mon, Wed, Fri from the weekly template, plus sample_task on Monday
+        assert count == 4
+        session.expire_all()
+        regenerated = [
+            t for t in task_service.get_tasks_for_date(session, MONDAY) if t.template_id
+        ]
+        assert [t.template_id for t in regenerated] == [sample_template.id]
+        assert regenerated[0].status == TaskStatus.PENDING  # Fresh instance
+        assert regenerated[0].created_at is not None  # Stamped by the database
+        # sample_task is a one-off on the same Monday; it is never touched
+        assert session.get(Task, sample_task.id) is not None
 
 
 class TestTaskOperations:
@@ -155,68 +245,226 @@ class TestTaskOperations:
         assert task.title == "Updated Title"
         assert task.expected_minutes == 25
     
+    def test_complete_task_keeps_existing_completed_at(self, session, sample_completed_task):
+        """Completing again must not move the original completion time."""
+        stamped = sample_completed_task.completed_at
+        task = task_service.complete_task(session, sample_completed_task.id)
+        
+        assert task.completed_at == stamped
+    
+    def test_update_missing_task_returns_none(self, session):
+        assert task_service.update_task(session, 9999, TaskUpdate(title="Nope")) is None
+    
+    def test_mutations_leave_task_loaded(self, session, sample_task):
+        """Without a refresh, the returned task is still fully loaded after commit."""
+        session.expire_on_commit = False  # As in get_session
+        
+        columns = {attr.key for attr in inspect(Task).column_attrs}
+        
+        task = task_service.complete_task(session, sample_task.id)
+        assert not columns & inspect(task).expired_attributes
+        task = task_service.update_task(session, sample_task.id, TaskUpdate(title="Renamed"))
+        assert not columns & inspect(task).expired_attributes
+        assert task.title == "Renamed"
+    
     def test_get_tasks_for_date(self, session, sample_task):
         """Test retrieving tasks for a specific date."""
-        tasks = task_service.get_tasks_for_date(session, date.today())
+        tasks = task_service.get_tasks_for_date(session, TODAY)
         
         assert len(tasks) == 1
         assert tasks[0].id == sample_task.id
 
+    def test_get_recent_days_buckets_by_date(self, session, sample_task, sample_completed_task):
+        """Recent days come back newest first, one bucket per day, empty days included."""
+        history = task_service.get_recent_days(session, 3)
+        
+        assert list(history) == [TODAY, TODAY - timedelta(days=1), TODAY - timedelta(days=2)]
+        assert {t.id for t in history[TODAY]} == {sample_task.id, sample_completed_task.id}
+        assert history[TODAY - timedelta(days=1)] == []
+    
+    def test_tasks_for_date_uses_composite_index(self, session):
+        """The date lookup should be served by the index, without a sort step."""
+        plan = session.exec(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM task "
+            "WHERE scheduled_date = :d ORDER BY priority, \"order\""
+        ).bindparams(d=TODAY)).all()
+        details = " ".join(row[-1] for row in plan)
+
+        assert "ix_task_date_priority_order" in details
+        assert "TEMP B-TREE" not in details
+
+    def test_active_templates_use_partial_index(self, session):
+        """Active templates are read in order straight from the partial index."""
+        statement = (
+            select(TaskTemplate)
+            .where(TaskTemplate.is_active == True)
+            .order_by(TaskTemplate.order)
+        )
+        compiled = statement.compile(session.get_bind())
+        plan = session.exec(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+        details = " ".join(row[-1] for row in plan)
+
+        assert "ix_template_active_order" in details
+        assert "TEMP B-TREE" not in details
+
+    def test_template_date_lookup_uses_index(self, session):
+        """The NOT EXISTS probe in task generation seeks (template_id, scheduled_date)."""
+        plan = session.exec(text(
+            "EXPLAIN QUERY PLAN SELECT 1 FROM task "
+            "WHERE template_id = :t AND scheduled_date = :d"
+        ).bindparams(t=1, d=TODAY)).all()
+        details = " ".join(row[-1] for row in plan)
+
+        assert "uq_task_template_date" in details
+
 
 class TestTemplateAwareOperations:
     """Tests for template-aware task operations."""
     
+    def test_create_daily_snapshot_marks_template_tasks(self, session, sample_daily_template, sample_task):
+        """Snapshots flag template tasks only and report every task on the date."""
+        # sample_task is already scheduled for TODAY, the frozen Monday
+        task_service.generate_tasks_for_date(session, MONDAY)
+        
+        count = task_service.create_daily_snapshot(session, MONDAY)
+        
+        assert count == 2
+        snapshots = {t.template_id: t.is_snapshot for t in task_service.get_tasks_for_date(session, MONDAY)}
+        assert snapshots == {sample_daily_template.id: True, None: False}
+    
+    def test_move_weekly_task_keeps_the_row(self, session, sample_template):
+        """Moving to a new weekday moves the task itself instead of regenerating it."""
+        task = task_service.generate_tasks_for_date(session, MONDAY)[0]
+        task_service.complete_task(session, task.id)
+        
+        moved = task_service.move_task_to_date(session, task.id, TUESDAY, 3)
+        
+        assert moved.id == task.id
+        assert moved.scheduled_date == TUESDAY
+        assert moved.order == 3
+        assert moved.status == TaskStatus.COMPLETED
+        assert sample_template.weekdays == "1,2,4"
+    
+    def test_move_weekly_task_onto_existing_instance(self, session, sample_template):
+        """If the target day already has the template's task, the source is dropped."""
+        source = task_service.generate_tasks_for_date(session, MONDAY)[0]
+        target = task_service.generate_tasks_for_date(session, WEDNESDAY)[0]
+        
+        moved = task_service.move_task_to_date(session, source.id, WEDNESDAY, 0)
+        
+        assert moved.id == target.id
+        assert session.get(Task, source.id) is None
+        assert sample_template.weekdays == "2,4"
+    
+    def test_move_daily_task_converts_to_weekly(self, session, sample_daily_template):
+        """A daily task moved to Saturday leaves a weekly Tue-Sat template."""
+        task = task_service.generate_tasks_for_date(session, MONDAY)[0]
+        
+        moved = task_service.move_task_to_date(session, task.id, SATURDAY, 0)
+        
+        assert moved.scheduled_date == SATURDAY
+        assert sample_daily_template.repeat_type == RepeatType.WEEKLY
+        assert sample_daily_template.weekdays == "1,2,3,4,5"
+
+    def test_move_monthly_task_onto_existing_instance(self, session):
+        """Moving a monthly task onto a day that has its instance drops the source."""
+        template = TaskTemplate(
+            title="Pay Rent",
+            priority=TaskPriority.REQUIRED,
+            repeat_type=RepeatType.MONTHLY,
+            created_at=datetime(2025, 11, 15, 9, 30),
+        )
+        session.add(template)
+        session.commit()
+        source = task_service.generate_tasks_for_date(session, date(2025, 12, 15))[0]
+        target = Task(
+            title=template.title, priority=template.priority,
+            scheduled_date=date(2025, 12, 20), template_id=template.id,
+        )
+        session.add(target)
+        session.commit()
+
+        moved = task_service.move_task_to_date(session, source.id, date(2025, 12, 20), 0)
+
+        assert moved.id == target.id
+        assert session.get(Task, source.id) is None
+        assert template.repeat_type == RepeatType.MONTHLY
+
     def test_reorder_task_updates_template(self, session, sample_template):
         """Reordering a template task should update the template's order."""
         # Generate a task from the template
-        monday = date(2025, 12, 29)
-        tasks = task_service.generate_tasks_for_date(session, monday)
+        tasks = task_service.generate_tasks_for_date(session, MONDAY)
         task = tasks[0]
         
         # Reorder the task
         task_service.reorder_task(session, task.id, 5)
         
-        # Verify template was updated
-        session.refresh(sample_template)
+        # The service updated the same identity-mapped template instance
         assert sample_template.order == 5
     
+    def test_reorder_tasks_batch(self, session, sample_template, sample_task):
+        """Batch reorder updates every task and the templates behind them."""
+        tasks = task_service.generate_tasks_for_date(session, MONDAY)
+        template_task = next(t for t in tasks if t.template_id == sample_template.id)
+        
+        task_service.reorder_tasks(session, {
+            template_task.id: 3,
+            sample_task.id: 7,
+            9999: 1,  # Unknown ids are ignored
+        })
+        
+        session.expire_all()
+        assert session.get(Task, template_task.id).order == 3
+        assert session.get(Task, sample_task.id).order == 7
+        assert session.get(TaskTemplate, sample_template.id).order == 3
+    
     def test_move_weekly_task_updates_template_weekdays(self, session, sample_template):
         """Moving a weekly task should update the template's weekdays."""
         # Generate a task on Monday
-        monday = date(2025, 12, 29)
-        tasks = task_service.generate_tasks_for_date(session, monday)
+        tasks = task_service.generate_tasks_for_date(session, MONDAY)
         task = tasks[0]
         
         # Move to Tuesday (which wasn't in original weekdays)
-        tuesday = date(2025, 12, 30)
-        task_service.move_task_to_date(session, task.id, tuesday, 0)
+        task_service.move_task_to_date(session, task.id, TUESDAY, 0)
+        
+        # Verify template weekdays were updated on the live instance
+        assert weekday_set(sample_template.weekdays) == {1, 2, 4}  # Monday swapped for Tuesday
+    
+    def test_delete_weekly_task_drops_weekday(self, session, sample_template):
+        """Deleting a weekly task removes its weekday and the task row."""
+        task = task_service.generate_tasks_for_date(session, MONDAY)[0]
+        
+        assert task_service.delete_task_with_template_update(session, task.id)
         
-        # Verify template weekdays were updated
-        session.refresh(sample_template)
-        assert "1" in sample_template.weekdays  # Tuesday added
-        assert "0" not in sample_template.weekdays  # Monday removed
+        session.expire_all()
+        assert session.get(Task, task.id) is None
+        assert session.get(TaskTemplate, sample_template.id).weekdays == "2,4"
+    
+    def test_delete_missing_task_returns_false(self, session):
+        """Deleting an unknown task id reports not found."""
+        assert task_service.delete_task_with_template_update(session, 9999) is False
 
 
 class TestRepeatInfo:
     """Tests for repeat_info generation."""
     
-    def test_get_repeat_info_daily(self, session, sample_daily_template):
+    def test_get_repeat_info_daily(self, sample_daily_template_obj):
         """Daily template should return correct repeat info."""
-        info = task_service.get_repeat_info(sample_daily_template)
+        info = task_service.get_repeat_info(sample_daily_template_obj)
         
         assert info is not None
         assert info.type == RepeatType.DAILY
         assert info.days == ["Mon", "Tue", "Wed", "Thu", "Fri"]
     
-    def test_get_repeat_info_weekly(self, session, sample_template):
+    def test_get_repeat_info_weekly(self, sample_template_obj):
         """Weekly template should return correct repeat info."""
-        info = task_service.get_repeat_info(sample_template)
+        info = task_service.get_repeat_info(sample_template_obj)
         
         assert info is not None
         assert info.type == RepeatType.WEEKLY
         assert info.days == ["Mon", "Wed", "Fri"]
     
-    def test_get_repeat_info_none(self, session):
+    def test_get_repeat_info_none(self):
         """Non-repeating template should return None."""
         template = TaskTemplate(
             title="One-off",
@@ -228,4 +476,81 @@ class TestRepeatInfo:
         info = task_service.get_repeat_info(template)
         
         assert info is None
+    
+    def test_get_repeat_info_follows_template_edits(self, sample_template_obj):
+        """Cached repeat info is keyed on the pattern, so edits are picked up."""
+        first = task_service.get_repeat_info(sample_template_obj)
+        assert task_service.get_repeat_info(sample_template_obj) is first
+        
+        sample_template_obj.weekdays = "1"
+        info = task_service.get_repeat_info(sample_template_obj)
+        
+        assert info is not first
+        assert info.days == ["Tue"]
+
+
+class TestEnumStorage:
+    """Tests for integer-coded enum columns."""
+    
+    def test_enums_stored_as_codes(self, session, sample_template, sample_completed_task):
+        """Enum columns hold small integer codes, not strings."""
+        row = session.exec(text(
+            "SELECT priority, repeat_type FROM tasktemplate WHERE id = :id"
+        ).bindparams(id=sample_template.id)).one()
+        assert tuple(row) == (1, 2)  # REQUIRED, WEEKLY
+        
+        status = session.exec(text(
+            "SELECT status FROM task WHERE id = :id"
+        ).bindparams(id=sample_completed_task.id)).scalar_one()
+        assert status == 1  # COMPLETED
+    
+    def test_legacy_enum_names_are_migrated(self):
+        """Rows holding enum names from older versions are rewritten as codes."""
+        from sqlalchemy import create_engine
+        from app.database import migrate_enum_codes
+        
+        engine = create_engine("sqlite://")
+        SQLModel.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO task (id, title, priority, \"order\", expected_minutes, "
+                "scheduled_date, status, is_snapshot, created_at) "
+                "VALUES (1, 'Old', 'OPTIONAL', 0, 10, '2025-12-29', 'PENDING', 0, CURRENT_TIMESTAMP)"
+            ))
+        
+        migrate_enum_codes(engine)
+        
+        with engine.connect() as conn:
+            row = conn.execute(text("SELECT priority, status FROM task WHERE id = 1")).one()
+        assert tuple(row) == (2, 0)
+        with Session(engine) as session:
+            assert session.get(Task, 1).priority == TaskPriority.OPTIONAL
+
 
+class TestWeekdaysMask:
+    """Tests for the weekday bitmask on templates."""
+    
+    def test_weekdays_property_round_trips(self, sample_template_obj):
+        """The CSV weekdays view is derived from the mask."""
+        assert sample_template_obj.weekdays == "0,2,4"
+        
+        sample_template_obj.weekdays = "4,1"
+        
+        assert sample_template_obj.weekdays_mask == 0b10010
+        assert sample_template_obj.weekdays == "1,4"
+    
+    def test_legacy_weekdays_column_is_migrated(self):
+        """A database with the old comma-separated column gets a mask instead."""
+        from sqlalchemy import create_engine
+        from app.database import migrate_weekdays_mask
+        
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE tasktemplate (id INTEGER PRIMARY KEY, weekdays VARCHAR NOT NULL)"))
+            conn.execute(text("INSERT INTO tasktemplate VALUES (1, '0,2,4'), (2, '')"))
+        
+        migrate_weekdays_mask(engine)
+        
+        with engine.connect() as conn:
+            rows = conn.execute(text("SELECT * FROM tasktemplate ORDER BY id")).all()
+        assert [tuple(r) for r in rows] == [(1, 0b10101), (2, 0)]